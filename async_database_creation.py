@@ -0,0 +1,374 @@
+import asyncio
+import re
+import time
+import datetime
+
+
+countries = [
+    'us','brazil','russia','spain',
+    'italy','france','germany',
+    'turkey','india','iran','peru',
+    'canada','chile','china','mexico',
+    'saudi-arabia','pakistan','belgium',
+    'qatar', 'bangladesh',
+    'belarus', 'ecuador', 'sweden'
+]
+
+
+overall_columns = [
+    'total_cases',
+    'total_deaths',
+    'total_recoveries'
+]
+
+
+stat_columns = [
+    'total_cases',
+    'daily_cases',
+    'active_cases',
+    'total_deaths',
+    'daily_deaths'
+]
+
+
+async def create_pool(dbname, user='hp', password='test1234', host='127.0.0.1', concurrency=4):
+    """
+    Create a pool of connections to the PostgreSQL database based on the parameters.
+
+    parameters:
+        dbname: str.
+        Name of the database.
+
+        user: str.
+        Name of the user. Default hp.
+
+        password: str.
+        Password for the user to connect.
+
+        host: str.
+        The IP address of the hosted database. Default 127.0.0.1 (localhost).
+
+        concurrency: int.
+        Maximum number of connections held by the pool. Default 4.
+
+    returns:
+        pool: Pool object.
+        A pool of connections to the database.
+    """
+
+    import asyncpg
+
+    pool = await asyncpg.create_pool(
+        database=dbname, user=user, password=password, host=host,
+        min_size=1, max_size=concurrency
+    )
+
+    return pool
+
+
+def country_records(country):
+    """
+    Read the csv file of a country into a list of records ready to be copied into the database.
+
+    parameters:
+        country: str.
+        Name of the country as used in the data file names.
+
+    returns:
+        records: list.
+        A list of tuples ordered as the columns of the country relation.
+    """
+
+    import pandas as pd
+
+    data = pd.read_csv('./Data/covid19_'+country+'_stats.csv')
+    data[stat_columns] = data[stat_columns].fillna(0).astype('int64')
+
+    dates = [datetime.datetime.strptime(date, '%Y-%m-%d').date() for date in data.date]
+    values = data[stat_columns].values.tolist()
+
+    records = [(date, *row) for date, row in zip(dates, values)]
+
+    return records
+
+
+def overall_records():
+    """
+    Read the overall statistics csv file into a list of records ready to be copied into the database.
+
+    returns:
+        records: list.
+        A list of tuples ordered as the columns of the overall relation.
+    """
+
+    import pandas as pd
+
+    data = pd.read_csv('./Data/covid19_overall_stat.csv')
+    data[overall_columns] = data[overall_columns].fillna(0).astype('int64')
+    data['country'] = data.country.str.replace(' ','')
+
+    records = [tuple(row) for row in data[['country'] + overall_columns].values.tolist()]
+
+    return records
+
+
+async def load_overall_relation(pool, semaphore):
+    """
+    Recreate the relation of overall statistics and copy them over a pooled connection.
+
+    parameters:
+        pool: Pool object.
+        A pool of connections to the database.
+
+        semaphore: Semaphore.
+        Semaphore bounding the number of relations loaded at the same time.
+
+    returns:
+        timing: tuple.
+        Name of the relation and the seconds taken to load it.
+    """
+
+    async with semaphore:
+
+        start = time.perf_counter()
+        records = await asyncio.to_thread(overall_records)
+
+        async with pool.acquire() as conn:
+
+            async with conn.transaction():
+
+                await conn.execute("DROP TABLE IF EXISTS overall_stats;")
+                await conn.execute("""
+                CREATE TABLE overall_stats (
+                    country VARCHAR(25),
+                    total_cases BIGINT,
+                    total_deaths BIGINT,
+                    total_recoveries BIGINT
+                );""")
+                await conn.copy_records_to_table(
+                    'overall_stats', records=records, columns=['country'] + overall_columns
+                )
+
+        elapsed = time.perf_counter() - start
+        print('Table successfully created: ','overall_stats','(%.3fs)' % elapsed)
+
+    return 'overall_stats', elapsed
+
+
+async def load_country_relation(pool, semaphore, country):
+    """
+    Recreate the relation of a country and copy its statistics over a pooled connection.
+
+    parameters:
+        pool: Pool object.
+        A pool of connections to the database.
+
+        semaphore: Semaphore.
+        Semaphore bounding the number of countries loaded at the same time.
+
+        country: str.
+        Name of the country as used in the data file names.
+
+    returns:
+        timing: tuple.
+        Name of the relation and the seconds taken to load it.
+    """
+
+    async with semaphore:
+
+        start = time.perf_counter()
+        records = await asyncio.to_thread(country_records, country)
+        table = re.sub('-','',country)+'_stats'
+
+        async with pool.acquire() as conn:
+
+            async with conn.transaction():
+
+                await conn.execute("DROP TABLE IF EXISTS "+table+";")
+                await conn.execute("""
+                CREATE TABLE """+table+""" (
+                    date DATE PRIMARY KEY,
+                    total_cases INT,
+                    daily_cases INT,
+                    active_cases INT,
+                    total_deaths INT,
+                    daily_deaths INT
+                );""")
+                await conn.copy_records_to_table(
+                    table, records=records, columns=['date'] + stat_columns
+                )
+
+        elapsed = time.perf_counter() - start
+        print('Table successfully created: ',table,'(%.3fs)' % elapsed)
+
+    return table, elapsed
+
+
+async def update_country_relation(pool, semaphore, country):
+    """
+    Insert the latest row of a country's data file if the relation does not have it yet.
+
+    parameters:
+        pool: Pool object.
+        A pool of connections to the database.
+
+        semaphore: Semaphore.
+        Semaphore bounding the number of countries updated at the same time.
+
+        country: str.
+        Name of the country as used in the data file names.
+
+    returns:
+        timing: tuple.
+        Name of the relation and the seconds taken to update it.
+    """
+
+    async with semaphore:
+
+        start = time.perf_counter()
+        table = re.sub('-','',country)+'_stats'
+        today = datetime.datetime.today().date()
+
+        async with pool.acquire() as conn:
+
+            last_date = await conn.fetchval("SELECT max(date) FROM "+table+";")
+
+            if last_date != today:
+
+                update = (await asyncio.to_thread(country_records, country))[-1]
+
+                if update[0] == today:
+
+                    await conn.copy_records_to_table(
+                        table, records=[update], columns=['date'] + stat_columns
+                    )
+                    print("Table",table,"updated")
+
+        elapsed = time.perf_counter() - start
+
+    return table, elapsed
+
+
+async def load_relation(dbname, load, *args):
+    """
+    Load a single relation over a pool of its own connection, for callers running every relation in
+    a thread of their own, like the tasks of the pipeline.
+
+    parameters:
+        dbname: str.
+        Name of the database.
+
+        load: coroutine function.
+        Loader of the relation, taking the pool and a semaphore first, like load_country_relation.
+
+        args: tuple.
+        Remaining arguments of the loader.
+
+    returns:
+        timing: tuple.
+        Name of the relation and the seconds taken to load it.
+    """
+
+    pool = await create_pool(dbname, concurrency=1)
+
+    try:
+
+        timing = await load(pool, asyncio.Semaphore(1), *args)
+
+    finally:
+
+        await pool.close()
+
+    return timing
+
+
+async def create_country_relations(pool, concurrency=4):
+    """
+    Create relations for every country and the overall relation in the database in parallel, one pooled
+    connection per relation.
+
+    parameters:
+        pool: Pool object.
+        A pool of connections to the database.
+
+        concurrency: int.
+        Maximum number of relations loaded at the same time. Default 4.
+
+    returns:
+        timings: dict.
+        Seconds taken to load each relation, keyed by relation name.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    results = await asyncio.gather(
+        load_overall_relation(pool, semaphore),
+        *[load_country_relation(pool, semaphore, country) for country in countries]
+    )
+
+    return dict(results)
+
+
+async def update_database(pool, concurrency=4):
+    """
+    Updates the database with the daily updates on statistics for countries, in parallel.
+
+    parameters:
+        pool: Pool object.
+        A pool of connections to the database.
+
+        concurrency: int.
+        Maximum number of countries updated at the same time. Default 4.
+
+    returns:
+        timings: dict.
+        Seconds taken to update each relation, keyed by relation name.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    results = await asyncio.gather(*[
+        update_country_relation(pool, semaphore, country) for country in countries
+    ])
+
+    return dict(results)
+
+
+async def main(dbname, concurrency=4):
+    """
+    Load every country relation and apply the daily updates using a bounded pool of connections.
+
+    parameters:
+        dbname: str.
+        Name of the database.
+
+        concurrency: int.
+        Maximum number of connections and countries handled at the same time. Default 4.
+
+    returns:
+        timings: dict.
+        Seconds taken per relation for the load and the update.
+    """
+
+    pool = await create_pool(dbname, concurrency=concurrency)
+
+    try:
+
+        start = time.perf_counter()
+        load_timings = await create_country_relations(pool, concurrency)
+        update_timings = await update_database(pool, concurrency)
+
+    finally:
+
+        await pool.close()
+
+    print("Loaded",len(load_timings),"relations in %.3fs" % (time.perf_counter() - start))
+
+    timings = {'load':load_timings, 'update':update_timings}
+
+    return timings
+
+
+if __name__ == '__main__':
+
+	asyncio.run(main('covid19_stats'))
@@ -0,0 +1,518 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import threading
+
+
+change_log_file = './Data/covid19_changes.csv'
+
+
+stat_columns = [
+    'total_cases',
+    'daily_cases',
+    'active_cases',
+    'total_deaths',
+    'daily_deaths'
+]
+
+
+log_columns = ['version', 'change', 'country', 'date'] + stat_columns
+
+
+# Store tasks of the pipeline write data files from several threads at once.
+log_lock = threading.Lock()
+
+
+def last_version(path=change_log_file):
+    """
+    Retrieve the version of the latest change in the change log, reading only the end of the file.
+
+    parameters:
+        path: str.
+        Path of the change log.
+
+    returns:
+        version: int.
+        Version of the latest change, 0 if the log is empty or does not exist.
+    """
+
+    if not os.path.exists(path):
+
+        return 0
+
+    with open(path, 'rb') as file:
+
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(max(0, size - 4096))
+        lines = file.read().splitlines()
+
+    for line in reversed(lines):
+
+        version = line.split(b',', 1)[0]
+
+        if version.isdigit():
+
+            return int(version)
+
+    return 0
+
+
+def stat_values(data):
+    """
+    Convert the statistics of a data file read as strings to numbers, so that values written
+    differently, like 22658 and 22658.0, compare equal.
+
+    parameters:
+        data: DataFrame.
+        The statistics, values as strings.
+
+    returns:
+        values: DataFrame.
+        The statistics as numbers, NaN where missing, whether empty, null or nan.
+    """
+
+    import pandas as pd
+
+    values = data.replace({'':None, 'null':None}).apply(pd.to_numeric, errors='coerce')
+
+    return values
+
+
+def diff_rows(previous, current):
+    """
+    Find the rows of a data file that were added, revised or removed by a write. Statistics are
+    compared as numbers, and missing values compare equal.
+
+    parameters:
+        previous: DataFrame.
+        The data file before the write, values as strings. None if the file did not exist.
+
+        current: DataFrame.
+        The data file after the write, values as strings.
+
+    returns:
+        changes: DataFrame.
+        The added and revised rows of the current data file and the removed rows of the previous
+        one, ordered by date, with a change column set to insert, update or delete.
+    """
+
+    import numpy as np
+
+    if previous is None or previous.empty:
+
+        return current.assign(change='insert')
+
+    merged = current.merge(
+        previous, on='date', how='outer', suffixes=('', '_previous'), indicator=True
+    )
+    previous_columns = [stat+'_previous' for stat in stat_columns]
+
+    values = stat_values(merged[stat_columns]).values
+    previous_values = stat_values(merged[previous_columns]).values
+
+    inserted = (merged['_merge'] == 'left_only').values
+    deleted = (merged['_merge'] == 'right_only').values
+    updated = (merged['_merge'] == 'both').values & (
+        (values != previous_values) & ~(np.isnan(values) & np.isnan(previous_values))
+    ).any(axis=1)
+
+    # Removed rows are recorded with the statistics they had before the write.
+    changes = merged[['date'] + stat_columns].copy()
+    changes.loc[deleted, stat_columns] = merged.loc[deleted, previous_columns].values
+    changes['change'] = np.select([inserted, deleted], ['insert', 'delete'], 'update')
+    changes = changes[inserted | updated | deleted]
+
+    return changes
+
+
+def append_changes(changes, country, path=change_log_file):
+    """
+    Append changed rows to the change log, each with the next version.
+
+    parameters:
+        changes: DataFrame.
+        The changed rows, as returned by diff_rows.
+
+        country: str.
+        Name of the country of the rows.
+
+        path: str.
+        Path of the change log.
+
+    returns:
+        version: int.
+        Version of the latest change after the append.
+    """
+
+    version = last_version(path)
+
+    if changes.empty:
+
+        return version
+
+    exists = os.path.exists(path)
+
+    with open(path, 'a', newline='') as file:
+
+        writer = csv.writer(file, lineterminator='\n')
+
+        if not exists:
+
+            writer.writerow(log_columns)
+
+        for row in changes.itertuples(index=False):
+
+            version += 1
+            writer.writerow(
+                [version, row.change, country, row.date] + [getattr(row, stat) for stat in stat_columns]
+            )
+
+    return version
+
+
+def bootstrap_log(directory='./Data', path=change_log_file):
+    """
+    Start the change log with every row of the data files already written, as inserts. Consumers
+    syncing from version 0 then get the whole history, not only the rows written after the log
+    started. Nothing is done if the change log exists.
+
+    parameters:
+        directory: str.
+        Directory of the data files.
+
+        path: str.
+        Path of the change log.
+
+    returns:
+        version: int.
+        Version of the latest change in the change log.
+    """
+
+    import pandas as pd
+
+    if os.path.exists(path):
+
+        return last_version(path)
+
+    version = 0
+
+    for name in sorted(os.listdir(directory)):
+
+        if not (name.startswith('covid19_') and name.endswith('_stats.csv')):
+
+            continue
+
+        data = pd.read_csv(os.path.join(directory, name), dtype=str, keep_default_na=False)
+        version = append_changes(data.assign(change='insert'), name[len('covid19_'):-len('_stats.csv')], path)
+
+    return version
+
+
+def write_country_stats(dataframe, country, directory='./Data', path=change_log_file):
+    """
+    Write the data file of a country, recording the rows it adds, revises or removes in the change
+    log. The change log is started from the data files already written on the first write, and
+    appended before the data file is replaced, so a failed write can only record a change twice,
+    never miss one.
+
+    parameters:
+        dataframe: DataFrame.
+        DataFrame containing dates and statistics of the country.
+
+        country: str.
+        Name of the country as used in the data file names.
+
+        directory: str.
+        Directory of the data files.
+
+        path: str.
+        Path of the change log.
+
+    returns:
+        version: int.
+        Version of the latest change after the write.
+    """
+
+    import pandas as pd
+
+    data_path = directory+'/covid19_'+country+'_stats.csv'
+    previous = None
+
+    if os.path.exists(data_path):
+
+        previous = pd.read_csv(data_path, dtype=str, keep_default_na=False)
+
+    dataframe.to_csv(data_path+'.tmp', index=False)
+    current = pd.read_csv(data_path+'.tmp', dtype=str, keep_default_na=False)
+
+    with log_lock:
+
+        bootstrap_log(directory, path)
+        version = append_changes(diff_rows(previous, current), country, path)
+        os.replace(data_path+'.tmp', data_path)
+
+    return version
+
+
+def line_start(file, offset, header):
+    """
+    Find the start of the first line of the change log at or after a byte offset.
+
+    parameters:
+        file: file object.
+        The change log opened in binary mode.
+
+        offset: int.
+        Byte offset in the change log.
+
+        header: int.
+        Length of the header line in bytes.
+
+    returns:
+        start: int.
+        Byte offset of the start of the line, the size of the file if there is none.
+    """
+
+    if offset <= header:
+
+        return header
+
+    file.seek(offset - 1)
+    file.readline()
+
+    return file.tell()
+
+
+def seek_version(file, version):
+    """
+    Move a change log opened in binary mode to the first line with a version above the given one.
+    The log is ordered by version, so this is a binary search over byte offsets.
+
+    parameters:
+        file: file object.
+        The change log opened in binary mode.
+
+        version: int.
+        Version already synced by the consumer.
+    """
+
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    header = len(file.readline())
+
+    low, high = header, size
+
+    while low < high:
+
+        middle = (low + high) // 2
+        start = line_start(file, middle, header)
+        file.seek(start)
+        line = file.readline()
+
+        if not line or int(line.split(b',', 1)[0]) > version:
+
+            high = middle
+
+        else:
+
+            low = middle + 1
+
+    file.seek(line_start(file, low, header))
+
+
+def parse_value(value):
+    """
+    Convert a statistic of the change log to a number.
+
+    parameters:
+        value: str.
+        The statistic as written in the data file.
+
+    returns:
+        value: int or float.
+        The statistic, None if it is missing.
+    """
+
+    if value in ('', 'null', 'nan'):
+
+        return None
+
+    number = float(value)
+
+    return int(number) if number.is_integer() else number
+
+
+def changes_since(version, path=change_log_file):
+    """
+    Retrieve the changes recorded after a version. Only the changes themselves are read, not the
+    whole log.
+
+    parameters:
+        version: int.
+        Version already synced by the consumer, 0 for every change in the log.
+
+        path: str.
+        Path of the change log.
+
+    returns:
+        changes: list.
+        One dict per changed row, ordered by version.
+    """
+
+    if not os.path.exists(path):
+
+        return []
+
+    with open(path, 'rb') as file:
+
+        seek_version(file, version)
+        text = file.read().decode('utf-8')
+
+    changes = []
+
+    for row in csv.reader(io.StringIO(text)):
+
+        change = dict(zip(log_columns, row))
+        change['version'] = int(change['version'])
+
+        for stat in stat_columns:
+
+            change[stat] = parse_value(change[stat])
+
+        changes.append(change)
+
+    return changes
+
+
+def export_changes(version, output, format='ndjson', batch_size=10000, path=change_log_file):
+    """
+    Export the changes recorded after a version, as NDJSON or as Arrow record batches.
+
+    parameters:
+        version: int.
+        Version already synced by the consumer.
+
+        output: str.
+        Path of the export, '-' for standard output.
+
+        format: str.
+        ndjson or arrow. Default ndjson.
+
+        batch_size: int.
+        Number of changes per Arrow record batch. Default 10000.
+
+        path: str.
+        Path of the change log.
+
+    returns:
+        version: int.
+        Version of the latest exported change, to pass on the next export. The given version
+        if there were no changes.
+    """
+
+    changes = changes_since(version, path)
+
+    if format == 'ndjson':
+
+        file = sys.stdout if output == '-' else open(output, 'w')
+
+        try:
+
+            for change in changes:
+
+                file.write(json.dumps(change)+'\n')
+
+        finally:
+
+            if file is not sys.stdout:
+
+                file.close()
+
+    elif format == 'arrow':
+
+        import pyarrow as pa
+
+        schema = pa.schema(
+            [('version', pa.int64()), ('change', pa.string()), ('country', pa.string()), ('date', pa.string())]
+            + [(stat, pa.int64()) for stat in stat_columns]
+        )
+
+        sink = sys.stdout.buffer if output == '-' else pa.OSFile(output, 'wb')
+
+        try:
+
+            with pa.ipc.new_stream(sink, schema) as writer:
+
+                for start in range(0, len(changes), batch_size):
+
+                    writer.write_batch(pa.RecordBatch.from_pylist(changes[start:start+batch_size], schema=schema))
+
+        finally:
+
+            if output == '-':
+
+                sink.flush()
+
+            else:
+
+                sink.close()
+
+    else:
+
+        raise ValueError('Unknown export format: '+format)
+
+    return changes[-1]['version'] if changes else version
+
+
+def main(argv=None):
+    """
+    Command line entry point of the change feed.
+
+    parameters:
+        argv: list.
+        Command line arguments. Read from sys.argv when not passed.
+
+    returns:
+        code: int.
+        Exit code.
+    """
+
+    parser = argparse.ArgumentParser(description='Export the rows changed since a version.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='export the changes after a version')
+    export_parser.add_argument('--since', type=int, default=0, help='version already synced')
+    export_parser.add_argument('--format', choices=['ndjson', 'arrow'], default='ndjson')
+    export_parser.add_argument('--output', default='-', help="path of the export, '-' for stdout")
+
+    subparsers.add_parser('version', help='print the version of the latest change')
+    subparsers.add_parser('bootstrap', help='start the change log from the data files already written')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'version':
+
+        print(last_version())
+        return 0
+
+    if args.command == 'bootstrap':
+
+        with log_lock:
+
+            print(bootstrap_log())
+
+        return 0
+
+    version = export_changes(args.since, args.output, args.format)
+    print(version, file=sys.stderr)
+
+    return 0
+
+
+if __name__ == '__main__':
+
+	raise SystemExit(main())
@@ -1,10 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import re
-import pandas as pd
-import numpy as np
 import datetime
+import change_feed
+
+
+# Seconds to wait for a connection or a response, so a stalled download fails instead of hanging.
+request_timeout = 30
 
 
 countries = [
@@ -121,6 +121,74 @@ def retrieve_overall_stats(string):
     return values
 
 
+def fetch_page(url):
+    """
+    Download the web page from the specified url.
+    
+    parameters:
+        url: str.
+        The url to the web page to be scrapped.
+        
+    returns:
+        content: bytes.
+        Raw HTML content of the web page.
+    """
+    
+    import requests
+    
+    page = requests.get(url, timeout=request_timeout)
+    page.raise_for_status()
+    
+    return page.content
+
+
+def parse_page_contents(html):
+    """
+    Parses the raw HTML of a country page and retrieves the specific div tag class - col-md-12
+    
+    parameters:
+        html: bytes.
+        Raw HTML content of the web page.
+        
+    returns:
+        result: str.
+        HTML parsed web page content as string.
+    """
+    
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    result = soup.find_all('div', class_= 'col-md-12')
+    
+    return result
+
+
+def release_contents(content):
+    """
+    Decompose the parse tree the page contents belong to. BeautifulSoup trees are full of reference
+    cycles, so without this the whole page stays in memory until the garbage collector runs.
+    
+    parameters:
+        content: str.
+        HTML parsed web page content, as returned by page_contents.
+    """
+    
+    if not content:
+        
+        return
+    
+    root = content[0]
+    
+    while root.parent is not None:
+        
+        root = root.parent
+        
+    for child in list(root.contents):
+        
+        child.decompose()
+
+
 def page_contents(url):
     """
     Retrieves contents of the web page from the specified url and the specific div tag class - col-md-12
@@ -134,10 +202,7 @@ def page_contents(url):
         HTML parsed web page content as string.
     """
     
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, 'html.parser')
-    
-    result = soup.find_all('div', class_= 'col-md-12')
+    result = parse_page_contents(fetch_page(url))
     
     return result
 
@@ -187,6 +252,8 @@ def build_dataframe(values,stat_name,dataframe=None,date=None):
             DataFrame containing dates and passed statistic values.
     """
     
+    import pandas as pd
+    
     if dataframe is None and date is not None:
         
         dataframe = pd.DataFrame({'date':date, stat_name:values})
@@ -226,6 +293,121 @@ def clean_date(dataframe, date_col):
 
 
 
+def country_url(country):
+    """
+    Build the worldometers url of a country.
+    
+    parameters:
+        country: str.
+        Name of the country as used in the url.
+        
+    returns:
+        url: str.
+        The url to the country page.
+    """
+    
+    url = "https://www.worldometers.info/coronavirus/country/"+country+"/"
+    
+    return url
+
+
+def country_dataframe(content):
+    """
+    Build the DataFrame of the statistics of a single country from its page.
+    
+    parameters:
+        content: str.
+        HTML parsed web page content of the country.
+        
+    returns:
+        dataframe: DataFrame.
+        DataFrame containing the dates and statistics of the country.
+    """
+    
+    dataframe = None
+    
+    for stat in data_indexes:
+                    
+        script_contents = script_tag_contents(content, stat)
+        script_contents = clean(script_contents)
+        
+        if 'daily' in stat:
+            
+            data = retrieve_daily_stats(script_contents)
+        
+        else:
+            
+            data = retrieve_overall_stats(script_contents)
+            
+        if dataframe is None:
+            
+            date = retrieve_dates(script_contents)
+            dataframe = build_dataframe(data, stat, date= date)
+            
+        else:
+            
+            dataframe = build_dataframe(data, stat, dataframe= dataframe)
+        
+    dataframe = clean_date(dataframe, date_col='date')
+    
+    return dataframe
+
+
+def store_country(dataframe, country):
+    """
+    Validate the statistics of a single country and write them to its csv file. The csv file is
+    left as it was when any row is quarantined as blocking.
+    
+    parameters:
+        dataframe: DataFrame.
+        DataFrame containing the dates and statistics of the country.
+        
+        country: str.
+        Name of the country as used in the data file names.
+        
+    raises:
+        ValueError: if the statistics have blocking rows.
+    """
+    
+    import data_validation
+    
+    data_validation.check_country(dataframe, country)
+    change_feed.write_country_stats(dataframe, country)
+
+
+def scrape_country(country, content=None):
+    """
+    Scrape the statistics of a single country and write them to its csv file.
+    
+    parameters:
+        country: str.
+        Name of the country as used in the url.
+        
+        content: str.
+        HTML parsed web page content of the country. Downloaded when not passed.
+        
+    returns:
+        dataframe: DataFrame.
+        DataFrame containing the dates and statistics of the country.
+    """
+    
+    downloaded = content is None
+    
+    if downloaded:
+        
+        content = page_contents(country_url(country))
+    
+    dataframe = country_dataframe(content)
+    
+    if downloaded:
+        
+        release_contents(content)
+        
+    store_country(dataframe, country)
+    
+    return dataframe
+
+
 def scrape_data():
     """
     Scrape the web page for date, total cases, daily cases, total active cases, total_deaths, daily deaths
@@ -238,39 +420,17 @@ def scrape_data():
     boolean.
     """
     
-    has_been_run_once = False
-        
     for country in countries:
-                
-        url = "https://www.worldometers.info/coronavirus/country/"+country+"/"
-        content = page_contents(url)
         
-        for stat in data_indexes:
-                        
-            script_contents = script_tag_contents(content, stat)
-            script_contents = clean(script_contents)
+        try:
             
-            if 'daily' in stat:
-                
-                data = retrieve_daily_stats(script_contents)
+            scrape_country(country)
             
-            else:
-                
-                data = retrieve_overall_stats(script_contents)
-                
-            if not has_been_run_once:
-                
-                date = retrieve_dates(script_contents)
-                dataframe = build_dataframe(data, stat, date= date)
-                has_been_run_once = True
-                
-            else:
-                
-                dataframe = build_dataframe(data, stat, dataframe= dataframe)
+        except ValueError as error:
+            
+            print("Not written: ", country, error)
+            continue
             
-        dataframe = clean_date(dataframe, date_col='date')
-        dataframe.to_csv('./Data/covid19_'+country+'_stats.csv',index=False)
-        has_been_run_once = False
         print("Scraped successfully: ",country)
     
     return True
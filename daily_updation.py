@@ -1,10 +1,7 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import re
-import pandas as pd
-import numpy as np
+import math
 import datetime
+import country_stats
 
 
 country_mapping = {
@@ -71,8 +68,32 @@ def updated_stats(url):
         A tuple with total cases and total deaths of the day.
     """
     
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, 'html.parser')
+    import requests
+    
+    page = requests.get(url, timeout=country_stats.request_timeout)
+    page.raise_for_status()
+    
+    result = parse_updated_stats(page.content)
+    
+    return result
+
+
+def parse_updated_stats(html):
+    """
+    Parses the updated data on the number of cases and deaths in a day from the raw HTML of a country page.
+    
+    parameters:
+        html: bytes.
+        Raw HTML content of the country page.
+        
+    returns:
+        result: tuple.
+        A tuple with total cases and total deaths of the day. Empty if there is no update for today.
+    """
+    
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
     
     if date_check(soup):
         
@@ -89,7 +110,7 @@ def updated_stats(url):
         
     else:
         
-        daily_cases = np.NaN
+        daily_cases = float('nan')
         
     if 'new' in updates[1].contents[0]:
         
@@ -99,7 +120,7 @@ def updated_stats(url):
     
     else:
         
-        daily_deaths = np.NaN
+        daily_deaths = float('nan')
     
     
     result = (daily_cases, daily_deaths)
@@ -108,6 +129,105 @@ def updated_stats(url):
 
 
 
+def derive_update(country, updates, overall_data=None):
+    """
+    Append the daily update of a country to the statistics in its data file.
+    
+    parameters:
+        country: str.
+        Name of the country as used in the url and data file names.
+        
+        updates: tuple.
+        A tuple with daily cases and daily deaths, as returned by updated_stats.
+        
+        overall_data: DataFrame.
+        Overall statistics of all countries. Read from the data file when not passed.
+        
+    returns:
+        country_df: DataFrame.
+        Statistics of the country with today's row, None if there is no update.
+    """
+    
+    import pandas as pd
+    from timeseries_store import DailyUpdate
+    
+    if not updates:
+        
+        return None
+    
+    country_df = pd.read_csv('./Data/covid19_'+country+'_stats.csv')
+    
+    if overall_data is None:
+        
+        overall_data = pd.read_csv('./Data/covid19_overall_stat.csv')
+    
+    overall_county_data = overall_data[overall_data.country == country_mapping[country]]
+    
+    last_update = DailyUpdate.from_row(country_df.iloc[-1])
+    
+    if last_update.date == str(datetime.datetime.today().date()):
+        
+        return None
+    
+    total_cases = last_update.total_cases + updates[0]
+    
+    if not math.isnan(updates[1]):
+        
+        total_deaths = last_update.total_deaths + updates[1]
+        
+    else:
+        
+        total_deaths = last_update.total_deaths
+        
+    new_update = DailyUpdate(
+        date= datetime.datetime.today().date(),
+        total_cases= total_cases,
+        daily_cases= updates[0],
+        active_cases= total_cases - (
+            overall_county_data.total_recoveries.iloc[0] + overall_county_data.total_deaths.iloc[0]
+        ),
+        total_deaths= total_deaths,
+        daily_deaths= updates[1]
+    )
+    
+    country_df = pd.concat([country_df, pd.DataFrame([new_update.as_dict()])], ignore_index= True)
+    
+    return country_df
+
+
+def update_country(country, updates, overall_data=None):
+    """
+    Append the daily update of a country to its data file. The data file is left as it was when
+    the update is quarantined as blocking.
+    
+    parameters:
+        country: str.
+        Name of the country as used in the url and data file names.
+        
+        updates: tuple.
+        A tuple with daily cases and daily deaths, as returned by updated_stats.
+        
+        overall_data: DataFrame.
+        Overall statistics of all countries. Read from the data file when not passed.
+        
+    returns: bool.
+    True if the data file was updated.
+    
+    raises:
+        ValueError: if the update has blocking rows.
+    """
+    
+    country_df = derive_update(country, updates, overall_data)
+    
+    if country_df is None:
+        
+        return False
+    
+    country_stats.store_country(country_df, country)
+    
+    return True
+
+
 def daily_updates():
     """
     Scrape daily updates on covid-19 statistics and update data files.
@@ -116,41 +236,26 @@ def daily_updates():
     Boolean.
     """
     
+    import pandas as pd
+    
+    overall_data = pd.read_csv('./Data/covid19_overall_stat.csv')
+    
     for country in country_mapping.keys():
         
         url = "https://www.worldometers.info/coronavirus/country/"+country+"/"
         updates = updated_stats(url)
         
-        country_df = pd.read_csv('./Data/covid19_'+country+'_stats.csv')
-        overall_data = pd.read_csv('./Data/covid19_overall_stat.csv')
-        
-        overall_county_data = overall_data[overall_data.country == country_mapping[country]]
-        
-        last_update = country_df.iloc[-1]
-        new_update = last_update
-        
-        new_update.date = datetime.datetime.today().date()
-        
-        if updates:
+        try:
+            
+            updated = update_country(country, updates, overall_data)
             
-            new_update.total_cases = last_update.total_cases + updates[0]
-            new_update.daily_cases = updates[0]
+        except ValueError as error:
+            
+            print("Not written: ", country, error)
+            continue
+        
+        if updated:
             
-            if not np.isnan(updates[1]):
-                
-                new_update.total_deaths = last_update.total_deaths + updates[1]
-                new_update.daily_deaths = updates[1]
-                
-            else:
-                
-                new_update.daily_deaths = np.NaN
-                
-            new_update.active_cases = new_update.total_cases - (
-                overall_county_data.total_recoveries.iloc[0] + overall_county_data.total_deaths.iloc[0]
-            )
-        
-            country_df = country_df.append(new_update).reset_index(drop= True)
-            country_df.to_csv('./Data/covid19_'+country+'_stats.csv', index=False)
             print('Successfully updated: ',country)
             
         else:
@@ -0,0 +1,546 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from country_stats import countries
+
+
+stat_columns = [
+    'total_cases',
+    'daily_cases',
+    'active_cases',
+    'total_deaths',
+    'daily_deaths'
+]
+
+
+daily_totals = {
+    'daily_cases':'total_cases',
+    'daily_deaths':'total_deaths'
+}
+
+
+# Source revisions show up as negative daily values. Rows failing only this check are quarantined
+# for review but do not block the data file from being written.
+revision_checks = [
+    'negative_daily'
+]
+
+
+# Checks failed by a revision the source reports inconsistently. Rows failing only these block the
+# data file until they are reviewed and accepted with `python data_validation.py accept <country>`.
+acceptable_checks = revision_checks + [
+    'decreasing_total_cases',
+    'decreasing_total_deaths',
+    'daily_cases_mismatch',
+    'daily_deaths_mismatch'
+]
+
+
+overall_columns = [
+    'total_cases',
+    'total_deaths',
+    'total_recoveries'
+]
+
+
+data_directory = './Data'
+quarantine_directory = './Data/quarantine'
+accepted_file = './Data/accepted_revisions.csv'
+
+
+def read_country_data(countries=countries, directory=data_directory):
+    """
+    Read the data files of every country into a single DataFrame, so they can be checked at once.
+
+    parameters:
+        countries: list.
+        Names of the countries as used in the data file names.
+
+        directory: str.
+        Directory of the data files.
+
+    returns:
+        data: DataFrame.
+        Statistics of every country, with a country column. Values are read as strings, and only
+        empty values as missing, so that values like 'null' are caught by the checks instead of
+        by the parser.
+    """
+
+    frames = []
+
+    for country in countries:
+
+        frame = pd.read_csv(directory+'/covid19_'+country+'_stats.csv', dtype=str, keep_default_na=False)
+        frame = frame.replace('', None)
+        frame.insert(0, 'country', country)
+        frames.append(frame)
+
+    data = pd.concat(frames, ignore_index=True)
+
+    return data
+
+
+def as_strings(dataframe):
+    """
+    Convert a DataFrame to strings as they are written to its data file, so that new statistics
+    are checked the same way as the data files read back.
+
+    parameters:
+        dataframe: DataFrame.
+        DataFrame containing dates and statistics.
+
+    returns:
+        data: DataFrame.
+        The DataFrame with values as strings, None where missing.
+    """
+
+    data = dataframe.astype(str).where(dataframe.notna(), None)
+    data = data.replace('', None)
+
+    return data
+
+
+def numeric_columns(data, columns):
+    """
+    Convert columns to numbers, flagging the values that are present but not numeric.
+
+    parameters:
+        data: DataFrame.
+        Data with the columns as strings.
+
+        columns: list.
+        Names of the columns to convert.
+
+    returns:
+        result: tuple.
+        DataFrame of the converted columns, NaN where missing or malformed, and a boolean
+        DataFrame flagging the malformed values.
+    """
+
+    raw = data.reindex(columns=columns)
+    values = raw.apply(pd.to_numeric, errors='coerce')
+    malformed = values.isna() & raw.notna()
+
+    return (values, malformed)
+
+
+def country_checks(data, previous=None, accepted=None):
+    """
+    Run the checks on the statistics of every country at once.
+
+    parameters:
+        data: DataFrame.
+        Statistics of every country, as returned by read_country_data.
+
+        previous: DataFrame.
+        Statistics currently in the data files, as returned by read_country_data. Decreasing
+        totals and mismatching daily values already present there are not flagged again. Every
+        revision is flagged when not passed.
+
+        accepted: DataFrame.
+        Revisions accepted after review, as returned by read_accepted. Accepted rows are not
+        flagged for decreasing totals or mismatching daily values.
+
+    returns:
+        checks: DataFrame.
+        One boolean column per check, True where the row fails it.
+    """
+
+    checks = pd.DataFrame(index=data.index)
+
+    missing = [column for column in ['date'] + stat_columns if column not in data.columns]
+    checks['missing_columns'] = bool(missing)
+
+    dates = pd.to_datetime(data.get('date'), format='%Y-%m-%d', errors='coerce')
+    checks['malformed_date'] = dates.isna()
+    checks['duplicate_date'] = data.duplicated(['country', 'date'], keep=False)
+
+    # Worldometers charts have null for the days without daily statistics.
+    raw = data.reindex(columns=stat_columns).replace({daily:{'null':None} for daily in daily_totals})
+    values, malformed = numeric_columns(raw, stat_columns)
+    totals = [column for column in stat_columns if column not in daily_totals]
+    checks['malformed_value'] = malformed.any(axis=1)
+    checks['fractional_value'] = ((values % 1).fillna(0) != 0).any(axis=1)
+    checks['negative_daily'] = (values[list(daily_totals)] < 0).any(axis=1)
+    checks['negative_total'] = (values[totals] < 0).any(axis=1)
+    checks['missing_total'] = values[['total_cases', 'total_deaths']].isna().any(axis=1)
+    checks['active_exceeds_total'] = values.active_cases > values.total_cases
+
+    order = np.lexsort((dates.values, data.country.values))
+    ordered = values.iloc[order]
+    countries = data.country.values[order]
+    same_country = countries[1:] == countries[:-1]
+
+    for daily, total in daily_totals.items():
+
+        difference = np.diff(ordered[total].values)
+        reported = ordered[daily].values[1:] == difference
+
+        # A decrease reported as a negative daily value is a revision, flagged by negative_daily only.
+        decreasing = same_country & (difference < 0) & ~reported
+        mismatch = same_country & ~reported & ~np.isnan(ordered[daily].values[1:])
+
+        checks['decreasing_'+total] = False
+        checks[daily+'_mismatch'] = False
+        checks.loc[ordered.index[1:][decreasing], 'decreasing_'+total] = True
+        checks.loc[ordered.index[1:][mismatch], daily+'_mismatch'] = True
+
+    # Revisions already in the data file, or accepted after review, are not flagged again while the
+    # totals of their row are unchanged.
+    reviewable = [check for check in acceptable_checks if check not in revision_checks]
+    reviewed = []
+
+    if previous is not None:
+
+        reviewed.append(previous[country_checks(previous)[reviewable].any(axis=1).values])
+
+    if accepted is not None:
+
+        reviewed.append(accepted)
+
+    reviewed = [frame for frame in reviewed if not frame.empty]
+
+    if reviewed:
+
+        reviewed = pd.concat(reviewed, ignore_index=True)
+        reviewed_values, _ = numeric_columns(reviewed, ['total_cases', 'total_deaths'])
+        keys = pd.MultiIndex.from_arrays(
+            [reviewed.country, reviewed.date, reviewed_values.total_cases, reviewed_values.total_deaths]
+        )
+        rows = pd.MultiIndex.from_arrays([data.country, data.date, values.total_cases, values.total_deaths])
+        is_reviewed = rows.isin(keys)
+
+        for check in reviewable:
+
+            checks[check] &= ~is_reviewed
+
+    checks = checks.fillna(False).astype(bool)
+
+    return checks
+
+
+def overall_checks(data):
+    """
+    Run the checks on the overall statistics of every country.
+
+    parameters:
+        data: DataFrame.
+        Overall statistics read from the data file, values as strings.
+
+    returns:
+        checks: DataFrame.
+        One boolean column per check, True where the row fails it.
+    """
+
+    checks = pd.DataFrame(index=data.index)
+
+    missing = [column for column in ['country'] + overall_columns if column not in data.columns]
+    checks['missing_columns'] = bool(missing)
+    checks['duplicate_country'] = data.duplicated('country', keep=False)
+
+    # Recoveries are not reported by every country and are scraped as 'null'.
+    raw = data.reindex(columns=overall_columns).replace({'total_recoveries':{'null':None}})
+    values, malformed = numeric_columns(raw, overall_columns)
+
+    checks['malformed_value'] = malformed.any(axis=1)
+    checks['negative_value'] = (values < 0).any(axis=1)
+    checks['missing_total'] = values[['total_cases', 'total_deaths']].isna().any(axis=1)
+    checks['deaths_exceed_cases'] = values.total_deaths > values.total_cases
+
+    return checks
+
+
+def failed_rows(data, checks):
+    """
+    Select the rows failing any check, with the names of the checks they fail.
+
+    parameters:
+        data: DataFrame.
+        The checked data.
+
+        checks: DataFrame.
+        One boolean column per check, as returned by country_checks or overall_checks.
+
+    returns:
+        failed: DataFrame.
+        The failing rows with a reasons column, and a blocking column which is False for rows
+        failing revision checks only.
+    """
+
+    failing = checks.any(axis=1)
+    names = np.array(checks.columns)
+    blocking = checks.drop(columns=revision_checks, errors='ignore').any(axis=1)
+
+    failed = data[failing].copy()
+    failed['reasons'] = [';'.join(names[row]) for row in checks[failing].values]
+    failed['blocking'] = blocking[failing]
+
+    return failed
+
+
+def quarantine(failed, name, directory=quarantine_directory):
+    """
+    Write the failing rows of a data file to quarantine, or clear its quarantine if none failed.
+
+    parameters:
+        failed: DataFrame.
+        The failing rows with a reasons column.
+
+        name: str.
+        Name of the data file.
+
+        directory: str.
+        Directory of the quarantined rows.
+    """
+
+    path = os.path.join(directory, name)
+
+    if failed.empty:
+
+        if os.path.exists(path):
+
+            os.remove(path)
+
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    failed.to_csv(path, index=False)
+
+
+def read_accepted(path=accepted_file):
+    """
+    Read the revisions accepted after review.
+
+    parameters:
+        path: str.
+        Path of the accepted revisions file.
+
+    returns:
+        accepted: DataFrame.
+        Country, date and totals of every accepted row, values as strings. None if nothing was
+        accepted yet.
+    """
+
+    if not os.path.exists(path):
+
+        return None
+
+    accepted = pd.read_csv(path, dtype=str, keep_default_na=False)
+
+    return accepted
+
+
+def accept_revisions(country, quarantine_from=quarantine_directory, path=accepted_file):
+    """
+    Accept the quarantined revisions of a country once reviewed, so that the rows stop blocking its
+    data file. Only rows failing nothing but the acceptable checks are accepted, and only with the
+    totals they were quarantined with.
+
+    parameters:
+        country: str.
+        Name of the country as used in the data file names.
+
+        quarantine_from: str.
+        Directory of the quarantined rows.
+
+        path: str.
+        Path of the accepted revisions file.
+
+    returns:
+        count: int.
+        Number of rows accepted.
+    """
+
+    quarantined = os.path.join(quarantine_from, 'covid19_'+country+'_stats.csv')
+
+    if not os.path.exists(quarantined):
+
+        return 0
+
+    failed = pd.read_csv(quarantined, dtype=str, keep_default_na=False)
+    acceptable = failed.reasons.str.split(';').apply(lambda reasons: set(reasons) <= set(acceptable_checks))
+    rows = failed[acceptable & (failed.blocking == 'True')][['date', 'total_cases', 'total_deaths']]
+
+    if rows.empty:
+
+        return 0
+
+    rows.insert(0, 'country', country)
+    rows.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+    return len(rows)
+
+
+def check_country(dataframe, country, directory=data_directory, quarantine_to=quarantine_directory,
+                  accepted_from=accepted_file):
+    """
+    Validate the new statistics of a country before they replace its data file. Failing rows are
+    written to quarantine.
+
+    parameters:
+        dataframe: DataFrame.
+        DataFrame containing dates and statistics of the country.
+
+        country: str.
+        Name of the country as used in the data file names.
+
+        directory: str.
+        Directory of the data files.
+
+        quarantine_to: str.
+        Directory of the quarantined rows.
+
+        accepted_from: str.
+        Path of the accepted revisions file.
+
+    returns:
+        failed: DataFrame.
+        The failing rows, none of them blocking.
+
+    raises:
+        ValueError: if any row blocks the statistics from being written.
+    """
+
+    name = 'covid19_'+country+'_stats.csv'
+    previous = None
+
+    if os.path.exists(os.path.join(directory, name)):
+
+        previous = read_country_data([country], directory)
+
+    data = as_strings(dataframe)
+    data.insert(0, 'country', country)
+
+    accepted = read_accepted(accepted_from)
+    failed = failed_rows(data, country_checks(data, previous, accepted)).drop(columns='country')
+    quarantine(failed, name, quarantine_to)
+
+    if failed.blocking.any():
+
+        raise ValueError(
+            country+' has '+str(int(failed.blocking.sum()))+' rows in quarantine, see '+quarantine_to
+        )
+
+    return failed
+
+
+def check_overall(dataframe, quarantine_to=quarantine_directory):
+    """
+    Validate the new overall statistics before they replace their data file. Failing rows are
+    written to quarantine.
+
+    parameters:
+        dataframe: DataFrame.
+        DataFrame containing the overall statistics of every country.
+
+        quarantine_to: str.
+        Directory of the quarantined rows.
+
+    returns:
+        failed: DataFrame.
+        The failing rows, none of them blocking.
+
+    raises:
+        ValueError: if any row blocks the statistics from being written.
+    """
+
+    data = as_strings(dataframe)
+
+    failed = failed_rows(data, overall_checks(data))
+    quarantine(failed, 'covid19_overall_stat.csv', quarantine_to)
+
+    if failed.blocking.any():
+
+        raise ValueError(
+            'overall has '+str(int(failed.blocking.sum()))+' rows in quarantine, see '+quarantine_to
+        )
+
+    return failed
+
+
+def validate_data(countries=countries, directory=data_directory, quarantine_to=quarantine_directory):
+    """
+    Audit the data files of every country and the overall statistics already written. Failing rows
+    are written to quarantine, one file per data file.
+
+    parameters:
+        countries: list.
+        Names of the countries as used in the data file names.
+
+        directory: str.
+        Directory of the data files.
+
+        quarantine_to: str.
+        Directory of the quarantined rows.
+
+    returns:
+        quarantined: dict.
+        Number of blocking rows keyed by country, 'overall' for the overall statistics.
+    """
+
+    quarantined = {}
+
+    data = read_country_data(countries, directory)
+    failed = failed_rows(data, country_checks(data, accepted=read_accepted()))
+
+    for country in countries:
+
+        country_failed = failed[failed.country == country].drop(columns='country')
+        quarantine(country_failed, 'covid19_'+country+'_stats.csv', quarantine_to)
+
+        if country_failed.blocking.any():
+
+            quarantined[country] = int(country_failed.blocking.sum())
+
+    overall = pd.read_csv(directory+'/covid19_overall_stat.csv', dtype=str, keep_default_na=False)
+    overall = overall.replace('', None)
+    overall_failed = failed_rows(overall, overall_checks(overall))
+    quarantine(overall_failed, 'covid19_overall_stat.csv', quarantine_to)
+
+    if overall_failed.blocking.any():
+
+        quarantined['overall'] = int(overall_failed.blocking.sum())
+
+    for name, count in quarantined.items():
+
+        print("Quarantined: ", name, count, "rows")
+
+    return quarantined
+
+
+def main(argv=None):
+    """
+    Command line entry point of the validation.
+
+    parameters:
+        argv: list.
+        Command line arguments. Read from sys.argv when not passed.
+
+    returns:
+        code: int.
+        Exit code.
+    """
+
+    parser = argparse.ArgumentParser(description='Audit the data files and accept reviewed revisions.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('audit', help='audit every data file already written, the default')
+    accept_parser = subparsers.add_parser('accept', help='accept the quarantined revisions of a country')
+    accept_parser.add_argument('country', choices=countries)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'accept':
+
+        print("Accepted: ", args.country, accept_revisions(args.country), "rows")
+        return 0
+
+    validate_data()
+
+    return 0
+
+
+if __name__ == '__main__':
+
+	raise SystemExit(main())
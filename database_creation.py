@@ -1,11 +1,5 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import re
-import pandas as pd
-import numpy as np
 import datetime
-from psycopg2 import connect
 
 
 countries = [
@@ -44,6 +38,8 @@ def connect_database(dbname, user='hp', password='test1234', host='127.0.0.1', a
         A connection object to the database.
     """
     
+    from psycopg2 import connect
+    
     conn = connect("dbname="+dbname+" user="+user+" password="+password+" host="+host)
     conn.autocommit = True
     
@@ -51,58 +47,80 @@ def connect_database(dbname, user='hp', password='test1234', host='127.0.0.1', a
 
 
 
-def create_country_relations(conn):
+def create_country_relation(cursor, country):
     """
-    Create relations for every country in the database, for covid-19 statistics.
+    Create the relation of a single country in the database, for covid-19 statistics.
     
     parameters:
-        conn: connection object.
-        A connection object to the database.
+        cursor: cursor object.
+        A cursor on the connection to the database.
+        
+        country: str.
+        Name of the country as used in the data file names.
         
     returns: bool.
     Boolean.
     """
     
-    cursor = conn.cursor()
+    import pandas as pd
     
-    for country in countries:
-        
-        data = pd.read_csv('./Data/covid19_'+country+'_stats.csv')
-        country = re.sub('-','',country)
+    data = pd.read_csv('./Data/covid19_'+country+'_stats.csv')
+    country = re.sub('-','',country)
+    
+    query = "DROP TABLE IF EXISTS "+country+"_stats;"
+    cursor.execute(query)
+    
+    query = """
+    CREATE TABLE """+country+"""_stats (
+        date DATE PRIMARY KEY, 
+        total_cases INT,
+        daily_cases INT,
+        active_cases INT,
+        total_deaths INT,
+        daily_deaths INT
+    );"""
+    
+    cursor.execute(query)
+    
+    for ind,row in data.iterrows():
         
-        query = "DROP TABLE IF EXISTS "+country+"_stats;"
-        cursor.execute(query)
+        row = row.fillna(0)
         
         query = """
-        CREATE TABLE """+country+"""_stats (
-            date DATE PRIMARY KEY, 
-            total_cases INT,
-            daily_cases INT,
-            active_cases INT,
-            total_deaths INT,
-            daily_deaths INT
+        INSERT INTO """+country+"""_stats
+        VALUES (
+        '"""+row.date+"""',
+        """+str(row.total_cases)+""",
+        """+str(row.daily_cases)+""",
+        """+str(row.active_cases)+""",
+        """+str(row.total_deaths)+""",
+        """+str(row.daily_deaths)+"""
         );"""
         
         cursor.execute(query)
         
-        for ind,row in data.iterrows():
-            
-            row = row.fillna(0)
-            
-            query = """
-            INSERT INTO """+country+"""_stats
-            VALUES (
-            '"""+row.date+"""',
-            """+str(row.total_cases)+""",
-            """+str(row.daily_cases)+""",
-            """+str(row.active_cases)+""",
-            """+str(row.total_deaths)+""",
-            """+str(row.daily_deaths)+"""
-            );"""
-            
-            cursor.execute(query)
-            
-        print('Table successfully created: ',country+'_stats')
+    print('Table successfully created: ',country+'_stats')
+    
+    return True
+
+
+def create_country_relations(conn):
+    """
+    Create relations for every country in the database, for covid-19 statistics.
+    
+    parameters:
+        conn: connection object.
+        A connection object to the database.
+        
+    returns: bool.
+    Boolean.
+    """
+    
+    cursor = conn.cursor()
+    
+    for country in countries:
+        
+        create_country_relation(cursor, country)
         
     return True
 
@@ -120,6 +138,8 @@ def create_overall_relation(conn):
     Boolean.
     """
     
+    import pandas as pd
+    
     cursor = conn.cursor()
     
     data = pd.read_csv('./Data/covid19_overall_stat.csv')
@@ -158,6 +178,58 @@ def create_overall_relation(conn):
 
 
 
+def update_country_relation(cursor, country):
+    """
+    Updates the relation of a single country with the daily update from its data file.
+    
+    parameters:
+        cursor: cursor object.
+        A cursor on the connection to the database.
+        
+        country: str.
+        Name of the country as used in the data file names.
+        
+    returns: bool.
+    True if the relation was updated.
+    """
+    
+    import pandas as pd
+    
+    query = "SELECT date FROM "+country.replace('-','')+"_stats ORDER BY date DESC LIMIT 1;"
+    cursor.execute(query)
+    last_date = cursor.fetchone()[0]
+    
+    if (pd.to_datetime(last_date).date() == datetime.datetime.today().date()):
+        
+        return False
+    
+    data = pd.read_csv('./Data/covid19_'+country+'_stats.csv')
+    update = data.iloc[-1].fillna(0)
+    
+    if pd.to_datetime(update.date).date() != datetime.datetime.today().date():
+        
+        return False
+    
+    query = """
+    INSERT INTO """+country.replace('-','')+"""_stats
+    VALUES (
+    '"""+update.date+"""',
+    """+str(update.total_cases)+""",
+    """+str(update.daily_cases)+""",
+    """+str(update.active_cases)+""",
+    """+str(update.total_deaths)+""",
+    """+str(update.daily_deaths)+"""
+    );
+    """
+    
+    cursor.execute(query)
+    
+    print("Table",country+"_stats updated")
+    
+    return True
+
+
+
 def update_database(conn):
     """
     Updates the database with the daily updates on statistics for countries.
@@ -174,35 +246,7 @@ def update_database(conn):
     
     for country in countries:
         
-        query = "SELECT date FROM "+country.replace('-','')+"_stats ORDER BY date DESC LIMIT 1;"
-        cursor.execute(query)
-        last_date = cursor.fetchone()[0]
-        
-        if (pd.to_datetime(last_date).date() != datetime.datetime.today().date()):
-            
-            data = pd.read_csv('./Data/covid19_'+country+'_stats.csv')
-            update = data.iloc[-1].fillna(0)
-            
-            if pd.to_datetime(update.date).date() != datetime.datetime.today().date():
-                
-                continue
-            
-            query = """
-            INSERT INTO """+country.replace('-','')+"""_stats
-            VALUES (
-            '"""+update.date+"""',
-            """+str(update.total_cases)+""",
-            """+str(update.daily_cases)+""",
-            """+str(update.active_cases)+""",
-            """+str(update.total_deaths)+""",
-            """+str(update.daily_deaths)+"""
-            );
-            """
-            
-            cursor.execute(query)
-            
-            print("Table",country+"_stats updated")
-            
+        update_country_relation(cursor, country)
     
     return True
     
@@ -0,0 +1,235 @@
+import json
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+
+def current_rss():
+    """
+    Resident set size of the current process.
+
+    returns:
+        rss: int.
+        Resident memory in bytes. Falls back to the peak RSS where /proc is not available.
+    """
+
+    try:
+
+        with open('/proc/self/statm') as file:
+
+            rss = int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+    except (OSError, ValueError, IndexError):
+
+        rss = peak_rss()
+
+    return rss
+
+
+def peak_rss():
+    """
+    Peak resident set size of the current process since it started.
+
+    returns:
+        rss: int.
+        Peak resident memory in bytes, 0 where the resource module is not available (Windows).
+    """
+
+    try:
+
+        import resource
+
+    except ImportError:
+
+        return 0
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    if sys.platform != 'darwin':
+
+        rss *= 1024
+
+    return rss
+
+
+class MemoryProfiler:
+    """
+    Opt-in memory profiler recording, for every stage, the RSS sampled while it runs and the memory
+    traced by tracemalloc, with the lines that allocated the most between the start and the end of
+    the stage. Stages running in parallel share one process, so their peaks and allocations overlap
+    and the traced peak is only reset when no other stage is running.
+    """
+
+    def __init__(self, report_path, sample_interval=0.05, top=5):
+
+        self.report_path = report_path
+        self.sample_interval = sample_interval
+        self.top = top
+        self.stages = []
+        self.active = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.sampler = None
+
+    def start(self):
+        """
+        Start tracing allocations and sampling the RSS in a background thread.
+        """
+
+        tracemalloc.start()
+        self.stopped.clear()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+
+    def sample(self):
+        """
+        Sample the RSS until the profiler stops, keeping the peak of every active stage.
+        """
+
+        while not self.stopped.wait(self.sample_interval):
+
+            rss = current_rss()
+
+            with self.lock:
+
+                for record in self.active.values():
+
+                    record['peak_rss'] = max(record['peak_rss'], rss)
+
+    def snapshot(self):
+        """
+        Take a snapshot of the traced allocations, leaving out those of tracemalloc itself.
+
+        returns:
+            snapshot: Snapshot.
+            The traced allocations.
+        """
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__)
+        ])
+
+        return snapshot
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Profile a stage of the refresh.
+
+        parameters:
+            name: str.
+            Name of the stage, e.g. a task id of the pipeline.
+        """
+
+        rss = current_rss()
+        start = time.perf_counter()
+
+        with self.lock:
+
+            if not self.active:
+
+                tracemalloc.reset_peak()
+
+            traced, _ = tracemalloc.get_traced_memory()
+            record = {'stage': name, 'start_rss': rss, 'peak_rss': rss, 'start_traced': traced}
+            self.active[id(record)] = record
+
+        start_snapshot = self.snapshot()
+
+        try:
+
+            yield record
+
+        finally:
+
+            with self.lock:
+
+                del self.active[id(record)]
+
+            traced, peak_traced = tracemalloc.get_traced_memory()
+            allocations = self.snapshot().compare_to(start_snapshot, 'lineno')
+
+            record['seconds'] = time.perf_counter() - start
+            record['end_rss'] = current_rss()
+            record['peak_rss'] = max(record['peak_rss'], record['end_rss'])
+            record['traced_delta'] = traced - record.pop('start_traced')
+            record['peak_traced'] = peak_traced
+            record['top_allocations'] = [
+                {
+                    'location': str(stat.traceback),
+                    'size_diff': stat.size_diff,
+                    'count_diff': stat.count_diff,
+                    'size': stat.size
+                }
+                for stat in allocations[:self.top]
+            ]
+
+            with self.lock:
+
+                self.stages.append(record)
+
+    def stop(self):
+        """
+        Stop profiling and write the report.
+
+        returns:
+            report: dict.
+            Peak RSS of the process and the records of every stage.
+        """
+
+        self.stopped.set()
+
+        if self.sampler is not None:
+
+            self.sampler.join()
+
+        tracemalloc.stop()
+
+        report = {'peak_rss': peak_rss(), 'stages': self.stages}
+
+        with open(self.report_path, 'w') as file:
+
+            json.dump(report, file, indent=2)
+
+        print("Memory report written: ", self.report_path)
+
+        return report
+
+
+class MemoryBudget:
+    """
+    Memory budget of a run. Once the RSS goes over the soft limit, the number of tasks allowed to
+    run at the same time is lowered in proportion to the memory left, down to a single task.
+    """
+
+    def __init__(self, limit, soft_fraction=0.8):
+
+        self.limit = limit
+        self.soft_limit = limit * soft_fraction
+
+    def allowed_workers(self, workers):
+        """
+        Number of tasks allowed to run at the same time given the current RSS.
+
+        parameters:
+            workers: int.
+            Number of tasks allowed when the memory is not constrained.
+
+        returns:
+            allowed: int.
+            Number of tasks allowed, at least 1.
+        """
+
+        rss = current_rss()
+
+        if rss < self.soft_limit:
+
+            return workers
+
+        allowed = max(1, int(workers * (self.limit - rss) / (self.limit - self.soft_limit)))
+
+        return allowed
@@ -1,10 +1,58 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import re
-import pandas as pd
-import numpy as np
-import datetime
+
+
+wikipedia_url = 'https://en.wikipedia.org/wiki/COVID-19_pandemic_by_country_and_territory'
+api_url = 'https://en.wikipedia.org/w/api.php'
+page_title = 'COVID-19_pandemic_by_country_and_territory'
+table_section = 0
+revision_file = './Data/wikipedia_revision.json'
+
+
+# Seconds before a request to Wikipedia is given up.
+request_timeout = 30
+
+
+def fetch_page(url):
+    """
+    Download the web page from the specified url.
+    
+    parameters:
+        url: str.
+        URL of the webpage.
+        
+    returns:
+        content: bytes.
+        Raw HTML content of the webpage.
+    """
+    
+    import requests
+    
+    page_content = requests.get(url, timeout=request_timeout)
+    page_content.raise_for_status()
+    
+    return page_content.content
+
+
+def parse_table_contents(html):
+    """
+    Parse the raw HTML of the webpage and retrieve the contents of the table.
+    
+    parameters:
+        html: bytes.
+        Raw HTML content of the webpage.
+        
+    returns:
+        table_data: str.
+        HTML parsed table data in string format.
+    """
+    
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    table_data = soup.find('table', id='thetable')
+    
+    return table_data
 
 
 def table_contents(url):
@@ -20,13 +68,218 @@ def table_contents(url):
         HTML parsed table data in string format.
     """
     
-    page_content = requests.get(url)
-    soup = BeautifulSoup(page_content.content, 'html.parser')
-    table_data = soup.find('table', id='thetable')
+    table_data = parse_table_contents(fetch_page(url))
     
     return table_data
 
 
+def api_request(params, api_url=api_url):
+    """
+    Send a request to the MediaWiki API.
+    
+    parameters:
+        params: dict.
+        Parameters of the request, besides format. The action defaults to parse.
+        
+        api_url: str.
+        URL of the MediaWiki API. Default English Wikipedia.
+        
+    returns:
+        result: dict.
+        The object of the JSON response named after the action.
+    """
+    
+    import requests
+    
+    params = dict({'action':'parse'}, **params, format='json', formatversion=2)
+    response = requests.get(
+        api_url, params=params, headers={'User-Agent':'COVID-19-Web-Scraper'}, timeout=request_timeout
+    )
+    response.raise_for_status()
+    
+    result = response.json()
+    
+    if 'error' in result:
+        
+        raise ValueError(result['error'].get('info', result['error']))
+    
+    return result[params['action']]
+
+
+def revision_params(page=page_title):
+    """
+    Parameters of the MediaWiki query for the page metadata, which holds the ID of the current
+    revision without rendering the page.
+    
+    parameters:
+        page: str.
+        Title of the Wikipedia page.
+        
+    returns:
+        params: dict.
+        Parameters of the request, besides format.
+    """
+    
+    params = {'action':'query', 'prop':'info', 'titles':page}
+    
+    return params
+
+
+def query_revision(query):
+    """
+    Retrieve the ID of the current revision from the response to the page metadata query.
+    
+    parameters:
+        query: dict.
+        The query object of the JSON response.
+        
+    returns:
+        revid: int.
+        ID of the current revision.
+    """
+    
+    page = query['pages'][0]
+    
+    if page.get('missing'):
+        
+        raise ValueError(page['title']+' does not exist')
+    
+    revid = page['lastrevid']
+    
+    return revid
+
+
+def latest_revision(page=page_title, api_url=api_url):
+    """
+    Retrieve the ID of the current revision of a Wikipedia page, without its content.
+    
+    parameters:
+        page: str.
+        Title of the Wikipedia page.
+        
+        api_url: str.
+        URL of the MediaWiki API.
+        
+    returns:
+        revid: int.
+        ID of the current revision.
+    """
+    
+    revid = query_revision(api_request(revision_params(page), api_url))
+    
+    return revid
+
+
+def revision_html(revid, section=None, api_url=api_url):
+    """
+    Retrieve the rendered HTML of a revision of a Wikipedia page, or of one of its sections.
+    
+    parameters:
+        revid: int.
+        ID of the revision.
+        
+        section: int.
+        Index of the section. The whole page is retrieved when not passed.
+        
+        api_url: str.
+        URL of the MediaWiki API.
+        
+    returns:
+        html: str.
+        Rendered HTML of the revision or section.
+    """
+    
+    params = {'oldid':revid, 'prop':'text', 'disablelimitreport':1, 'disableeditsection':1}
+    
+    if section is not None:
+        
+        params['section'] = section
+        
+    html = api_request(params, api_url)['text']
+    
+    return html
+
+
+def cached_revision(path=revision_file):
+    """
+    Read the revision ID of the Wikipedia page the overall statistics were last scraped from.
+    
+    parameters:
+        path: str.
+        Path of the revision file.
+        
+    returns:
+        revid: int.
+        ID of the revision, None if the statistics were never scraped through the API.
+    """
+    
+    try:
+        
+        with open(path) as file:
+            
+            revid = json.load(file)['revid']
+            
+    except (FileNotFoundError, ValueError, KeyError):
+        
+        revid = None
+        
+    return revid
+
+
+def save_revision(revid, path=revision_file):
+    """
+    Record the revision ID of the Wikipedia page the overall statistics were scraped from.
+    
+    parameters:
+        revid: int.
+        ID of the revision.
+        
+        path: str.
+        Path of the revision file.
+    """
+    
+    with open(path, 'w') as file:
+        
+        json.dump({'page':page_title, 'revid':revid}, file)
+
+
+def fetch_table_html(api_url=api_url, force=False, path=revision_file):
+    """
+    Retrieve the HTML of the section holding the statistics table, only if the Wikipedia page
+    changed since the revision recorded in the revision file. The whole revision is retrieved
+    when the table is not in the expected section.
+    
+    parameters:
+        api_url: str.
+        URL of the MediaWiki API.
+        
+        force: bool.
+        Retrieve the table even if the revision did not change. Default False.
+        
+        path: str.
+        Path of the revision file.
+        
+    returns:
+        result: tuple.
+        ID of the current revision and the HTML holding the table. The HTML is None if the
+        revision did not change.
+    """
+    
+    revid = latest_revision(api_url=api_url)
+    
+    if not force and revid == cached_revision(path):
+        
+        return (revid, None)
+    
+    html = revision_html(revid, table_section, api_url)
+    
+    if 'id="thetable"' not in html:
+        
+        html = revision_html(revid, api_url=api_url)
+        
+    return (revid, html)
+
+
 def country_names(table_data):
     """
     Scrape country names from the table contents scraped from the Wikipedia url.
@@ -135,17 +388,20 @@ def table_statistics(table_data):
 
 
 
-def scrape_overall_data():
+def overall_dataframe(table_data):
     """
-    Scrape overall statistics country wise from the Wikipedia page on COVID-19 pandemic into a DataFrame.
-    Writes the DataFrame to a csv file.
+    Build the DataFrame of the overall statistics country wise from the Wikipedia table.
     
-    returns: bool.
+    parameters:
+        table_data: str.
+        HTML parsed table data.
     
+    returns:
+        dataframe: DataFrame.
+        DataFrame containing the overall statistics of every country.
     """
     
-    url = 'https://en.wikipedia.org/wiki/COVID-19_pandemic_by_country_and_territory'
-    table_data = table_contents(url)
+    import pandas as pd
     
     countries = country_names(table_data)
     statistics = table_statistics(table_data)
@@ -163,7 +419,47 @@ def scrape_overall_data():
     ]).reset_index()
     
     dataframe.rename(columns= {'index':'country'}, inplace= True)
+    
+    return dataframe
+
+
+def store_overall(dataframe):
+    """
+    Validate the overall statistics and write them to a csv file. The csv file is left as it was
+    when any row is quarantined as blocking.
+    
+    parameters:
+        dataframe: DataFrame.
+        DataFrame containing the overall statistics of every country.
+        
+    raises:
+        ValueError: if the statistics have blocking rows.
+    """
+    
+    import data_validation
+    
+    data_validation.check_overall(dataframe)
     dataframe.to_csv('./Data/covid19_overall_stat.csv', index= False)
+
+
+def scrape_overall_data(table_data=None):
+    """
+    Scrape overall statistics country wise from the Wikipedia page on COVID-19 pandemic into a DataFrame.
+    Writes the DataFrame to a csv file.
+    
+    parameters:
+        table_data: str.
+        HTML parsed table data. Downloaded from Wikipedia when not passed.
+    
+    returns: bool.
+    
+    """
+    
+    if table_data is None:
+        
+        table_data = table_contents(wikipedia_url)
+    
+    store_overall(overall_dataframe(table_data))
     
     print("Successfully scraped table")
     
@@ -172,6 +468,37 @@ def scrape_overall_data():
 
 
 
+def scrape_overall_data_api(api_url=api_url, force=False):
+    """
+    Scrape overall statistics through the MediaWiki API. Only the section holding the table is
+    downloaded, and nothing is scraped if the page did not change since the last run.
+    
+    parameters:
+        api_url: str.
+        URL of the MediaWiki API. Default English Wikipedia.
+        
+        force: bool.
+        Scrape the table even if the page did not change. Default False.
+        
+    returns: bool.
+    True if the table was scraped, False if the page did not change.
+    """
+    
+    revid, html = fetch_table_html(api_url, force)
+    
+    if html is None:
+        
+        print("No changes since revision", revid)
+        return False
+    
+    scrape_overall_data(parse_table_contents(html))
+    save_revision(revid)
+    
+    return True
+
+
+
+
 if __name__ == '__main__':
 
-    scrape_overall_data()
\ No newline at end of file
+    scrape_overall_data_api()
@@ -0,0 +1,679 @@
+import argparse
+import json
+import os
+import sys
+import datetime
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import country_stats
+import overall_stats
+import daily_updation
+import memory_profiling
+import change_feed
+
+
+state_file = './Data/pipeline_state.json'
+raw_directory = './Data/raw'
+revision_path = os.path.join(raw_directory, 'overall.revid')
+
+
+def raw_path(name):
+    """
+    Path of the raw HTML file downloaded for a page.
+
+    parameters:
+        name: str.
+        Name of the country, or 'overall' for the Wikipedia page.
+
+    returns:
+        path: str.
+        Path of the raw HTML file.
+    """
+
+    path = os.path.join(raw_directory, name+'.html')
+
+    return path
+
+
+def read_raw(name):
+    """
+    Read the raw HTML file downloaded for a page.
+
+    parameters:
+        name: str.
+        Name of the country, or 'overall' for the Wikipedia page.
+
+    returns:
+        html: bytes.
+        Raw HTML content of the page.
+    """
+
+    with open(raw_path(name), 'rb') as file:
+
+        html = file.read()
+
+    return html
+
+
+def staged_path(name):
+    """
+    Path of the statistics parsed for a data file, kept until they are validated.
+
+    parameters:
+        name: str.
+        Name of the country, or 'overall' for the overall statistics.
+
+    returns:
+        path: str.
+        Path of the staged csv file.
+    """
+
+    path = os.path.join(raw_directory, name+'.csv')
+
+    return path
+
+
+def read_staged(name):
+    """
+    Read the statistics staged for a data file, values as they were written.
+
+    parameters:
+        name: str.
+        Name of the country, or 'overall' for the overall statistics.
+
+    returns:
+        dataframe: DataFrame.
+        The staged statistics.
+    """
+
+    import pandas as pd
+
+    dataframe = pd.read_csv(staged_path(name), dtype=str, keep_default_na=False)
+
+    return dataframe
+
+
+def fetch_task(name, url):
+    """
+    Download a page and keep its raw HTML for the following stages.
+
+    parameters:
+        name: str.
+        Name of the country, or 'overall' for the Wikipedia page.
+
+        url: str.
+        URL of the page.
+    """
+
+    html = country_stats.fetch_page(url)
+    os.makedirs(raw_directory, exist_ok=True)
+
+    with open(raw_path(name), 'wb') as file:
+
+        file.write(html)
+
+
+def parse_country_task(country):
+    """
+    Parse the downloaded page of a country and stage its full history for validation.
+
+    parameters:
+        country: str.
+        Name of the country as used in the url and data file names.
+    """
+
+    content = country_stats.parse_page_contents(read_raw(country))
+    dataframe = country_stats.country_dataframe(content)
+    country_stats.release_contents(content)
+    dataframe.to_csv(staged_path(country), index=False)
+
+
+def fetch_overall_task():
+    """
+    Download the section of the Wikipedia page holding the statistics table, if the page changed
+    since the revision the data file was scraped from. The revision is kept next to the raw HTML
+    until the table is validated and stored.
+    """
+
+    revid, html = overall_stats.fetch_table_html()
+
+    if html is None:
+
+        if os.path.exists(revision_path):
+
+            os.remove(revision_path)
+
+        print("No changes since revision", revid)
+        return
+
+    os.makedirs(raw_directory, exist_ok=True)
+
+    with open(raw_path('overall'), 'w', encoding='utf-8') as file:
+
+        file.write(html)
+
+    with open(revision_path, 'w') as file:
+
+        file.write(str(revid))
+
+
+def parse_overall_task():
+    """
+    Parse the downloaded table and stage the overall statistics for validation. Nothing is staged if
+    the Wikipedia page did not change.
+    """
+
+    if not os.path.exists(revision_path):
+
+        if os.path.exists(staged_path('overall')):
+
+            os.remove(staged_path('overall'))
+
+        return
+
+    table_data = overall_stats.parse_table_contents(read_raw('overall'))
+    overall_stats.overall_dataframe(table_data).to_csv(staged_path('overall'), index=False)
+
+
+def derive_country_task(country):
+    """
+    Derive today's row of a country from its downloaded page and the overall statistics, and stage
+    the statistics with the new row for validation. Nothing is staged if there is no update.
+
+    parameters:
+        country: str.
+        Name of the country as used in the url and data file names.
+    """
+
+    updates = daily_updation.parse_updated_stats(read_raw(country))
+    dataframe = daily_updation.derive_update(country, updates)
+
+    if dataframe is None:
+
+        if os.path.exists(staged_path(country)):
+
+            os.remove(staged_path(country))
+
+        return
+
+    dataframe.to_csv(staged_path(country), index=False)
+
+
+def validate_country_task(country):
+    """
+    Validate the staged statistics of a country and, unless a row is quarantined as blocking, write
+    them to its data file. A blocked country keeps its previous data file and fails the task.
+
+    parameters:
+        country: str.
+        Name of the country as used in the data file names.
+    """
+
+    if not os.path.exists(staged_path(country)):
+
+        return
+
+    country_stats.store_country(read_staged(country), country)
+    os.remove(staged_path(country))
+
+
+def validate_overall_task():
+    """
+    Validate the staged overall statistics and, unless a row is quarantined as blocking, write them
+    to the data file and record the revision they were scraped from.
+    """
+
+    if not os.path.exists(revision_path):
+
+        return
+
+    with open(revision_path) as file:
+
+        revid = int(file.read())
+
+    overall_stats.store_overall(read_staged('overall'))
+    overall_stats.save_revision(revid)
+    os.remove(staged_path('overall'))
+    os.remove(revision_path)
+
+
+def load_country_task(country, dbname, daily):
+    """
+    Copy the data file of a country into the database over its own connection.
+
+    parameters:
+        country: str.
+        Name of the country as used in the data file names.
+
+        dbname: str.
+        Name of the database.
+
+        daily: bool.
+        Only insert today's row instead of recreating the relation.
+    """
+
+    import asyncio
+    import async_database_creation
+
+    if daily:
+
+        load = async_database_creation.update_country_relation
+
+    else:
+
+        load = async_database_creation.load_country_relation
+
+    asyncio.run(async_database_creation.load_relation(dbname, load, country))
+
+
+def load_overall_task(dbname):
+    """
+    Copy the overall statistics data file into the database over its own connection.
+
+    parameters:
+        dbname: str.
+        Name of the database.
+    """
+
+    import asyncio
+    import async_database_creation
+
+    asyncio.run(async_database_creation.load_relation(dbname, async_database_creation.load_overall_relation))
+
+
+def build_tasks(countries, daily=False, dbname=None):
+    """
+    Build the DAG of tasks of a refresh. Every page is fetched, then either parsed as the full
+    history, or, in daily mode, used to derive today's row. The statistics of every data file are
+    validated on their own before being written, and loaded into the database when a database name
+    is given, so a blocked data file only holds back its own load. Load tasks are named after the
+    database, so a load into one database is never taken as the checkpoint of another.
+
+    parameters:
+        countries: list.
+        Names of the countries to refresh.
+
+        daily: bool.
+        Derive today's rows instead of storing the full history. Default False.
+
+        dbname: str.
+        Name of the database to load. Loading is skipped when not passed.
+
+    returns:
+        tasks: dict.
+        Tasks keyed by task id, each with the callable to run and the ids of the tasks it depends on.
+    """
+
+    tasks = {
+        'fetch:overall': {'run': fetch_overall_task, 'deps': []},
+        'parse:overall': {'run': parse_overall_task, 'deps': ['fetch:overall']},
+        'validate:overall': {'run': validate_overall_task, 'deps': ['parse:overall']}
+    }
+
+    if dbname is not None:
+
+        tasks['load:'+dbname+':overall'] = {
+            'run': partial(load_overall_task, dbname),
+            'deps': ['validate:overall']
+        }
+
+    for country in countries:
+
+        tasks['fetch:'+country] = {
+            'run': partial(fetch_task, country, country_stats.country_url(country)),
+            'deps': []
+        }
+
+        if daily:
+
+            stage = 'derive:'+country
+            tasks[stage] = {
+                'run': partial(derive_country_task, country),
+                'deps': ['fetch:'+country, 'validate:overall']
+            }
+
+        else:
+
+            stage = 'parse:'+country
+            tasks[stage] = {'run': partial(parse_country_task, country), 'deps': ['fetch:'+country]}
+
+        tasks['validate:'+country] = {'run': partial(validate_country_task, country), 'deps': [stage]}
+
+        if dbname is not None:
+
+            tasks['load:'+dbname+':'+country] = {
+                'run': partial(load_country_task, country, dbname, daily),
+                'deps': ['validate:'+country]
+            }
+
+    return tasks
+
+
+def load_state(path=state_file):
+    """
+    Read the checkpoints of completed tasks from the state file.
+
+    parameters:
+        path: str.
+        Path of the state file.
+
+    returns:
+        state: dict.
+        Status and completion time keyed by task id. Empty if the file does not exist.
+    """
+
+    if not os.path.exists(path):
+
+        return {}
+
+    with open(path) as file:
+
+        state = json.load(file)
+
+    return state
+
+
+def save_state(state, path=state_file):
+    """
+    Write the checkpoints of tasks to the state file. The file is replaced atomically so an
+    interrupted run never leaves it half written.
+
+    parameters:
+        state: dict.
+        Status and completion time keyed by task id.
+
+        path: str.
+        Path of the state file.
+    """
+
+    directory = os.path.dirname(path)
+
+    if directory:
+
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path+'.tmp', 'w') as file:
+
+        json.dump(state, file, indent=2, sort_keys=True)
+
+    os.replace(path+'.tmp', path)
+
+
+def fresh_tasks(tasks, state, max_age):
+    """
+    Find the tasks whose checkpoints can be reused. A task is fresh when it completed within the
+    maximum age, after all of its dependencies, and all of its dependencies are fresh.
+
+    parameters:
+        tasks: dict.
+        Tasks keyed by task id.
+
+        state: dict.
+        Status and completion time keyed by task id.
+
+        max_age: timedelta.
+        Maximum age of a reusable checkpoint.
+
+    returns:
+        fresh: set.
+        Ids of the fresh tasks.
+    """
+
+    now = datetime.datetime.now()
+    memo = {}
+
+    def is_fresh(task_id):
+
+        if task_id in memo:
+
+            return memo[task_id]
+
+        entry = state.get(task_id, {})
+        result = entry.get('status') == 'done'
+
+        if result:
+
+            finished = datetime.datetime.fromisoformat(entry['finished_at'])
+            result = now - finished <= max_age
+
+            for dep in tasks[task_id]['deps']:
+
+                result = result and is_fresh(dep) and (
+                    datetime.datetime.fromisoformat(state[dep]['finished_at']) <= finished
+                )
+
+        memo[task_id] = result
+
+        return result
+
+    fresh = {task_id for task_id in tasks if is_fresh(task_id)}
+
+    return fresh
+
+
+def run_task(task_id, run, profiler=None):
+    """
+    Run a single task, profiling its memory when a profiler is given.
+
+    parameters:
+        task_id: str.
+        Id of the task.
+
+        run: callable.
+        The callable of the task.
+
+        profiler: MemoryProfiler.
+        Profiler recording the memory of the task.
+    """
+
+    if profiler is None:
+
+        run()
+        return
+
+    with profiler.stage(task_id):
+
+        run()
+
+
+def run_tasks(tasks, state, path=state_file, workers=4, max_age=datetime.timedelta(hours=12), force=False,
+              profiler=None, budget=None):
+    """
+    Run the tasks of the DAG, independent tasks in parallel, checkpointing every completed task.
+    Tasks with fresh checkpoints are not run again, and tasks depending on a failed task are skipped.
+
+    parameters:
+        tasks: dict.
+        Tasks keyed by task id.
+
+        state: dict.
+        Status and completion time keyed by task id. Updated in place.
+
+        path: str.
+        Path of the state file.
+
+        workers: int.
+        Maximum number of tasks run at the same time. Default 4.
+
+        max_age: timedelta.
+        Maximum age of a reusable checkpoint. Default 12 hours.
+
+        force: bool.
+        Run every task regardless of its checkpoint. Default False.
+
+        profiler: MemoryProfiler.
+        Profiler recording the memory of every task. Not profiled when not passed.
+
+        budget: MemoryBudget.
+        Memory budget lowering the number of tasks run at the same time. Unbounded when not passed.
+
+    returns:
+        failed: set.
+        Ids of the tasks that failed or were skipped.
+    """
+
+    done = set() if force else fresh_tasks(tasks, state, max_age)
+    pending = set(tasks) - done
+    failed = set()
+    running = {}
+
+    for task_id in sorted(done):
+
+        print("Checkpoint reused: ", task_id)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        while pending or running:
+
+            capacity = workers if budget is None else budget.allowed_workers(workers)
+
+            for task_id in sorted(pending):
+
+                if len(running) >= capacity:
+
+                    break
+
+                deps = tasks[task_id]['deps']
+
+                if any(dep in failed for dep in deps):
+
+                    pending.discard(task_id)
+                    failed.add(task_id)
+                    state[task_id] = {'status': 'skipped', 'finished_at': datetime.datetime.now().isoformat()}
+                    print("Skipped: ", task_id)
+
+                elif all(dep in done for dep in deps):
+
+                    pending.discard(task_id)
+                    running[executor.submit(run_task, task_id, tasks[task_id]['run'], profiler)] = task_id
+
+            if not running:
+
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+
+                task_id = running.pop(future)
+
+                try:
+
+                    future.result()
+                    done.add(task_id)
+                    state[task_id] = {'status': 'done', 'finished_at': datetime.datetime.now().isoformat()}
+                    print("Completed: ", task_id)
+
+                except Exception as error:
+
+                    failed.add(task_id)
+                    state[task_id] = {
+                        'status': 'failed',
+                        'error': repr(error),
+                        'finished_at': datetime.datetime.now().isoformat()
+                    }
+                    print("Failed: ", task_id, repr(error))
+
+            save_state(state, path)
+
+    save_state(state, path)
+
+    return failed
+
+
+def main(argv=None):
+    """
+    Command line entry point of the end to end refresh.
+
+    parameters:
+        argv: list.
+        Command line arguments. Read from sys.argv when not passed.
+
+    returns:
+        code: int.
+        Exit code, 1 if any task failed.
+    """
+
+    parser = argparse.ArgumentParser(description='Refresh covid-19 statistics end to end.')
+    parser.add_argument('--state', default=state_file, help='path of the checkpoint state file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the refresh, resuming failed or stale tasks')
+    run_parser.add_argument('--countries', nargs='+', default=country_stats.countries)
+    run_parser.add_argument('--daily', action='store_true', help="derive today's rows instead of full histories")
+    run_parser.add_argument('--load', metavar='DBNAME', help='load the data files into this database')
+    run_parser.add_argument('--workers', type=int, default=4)
+    run_parser.add_argument('--max-age', type=float, default=12, help='hours a checkpoint stays fresh')
+    run_parser.add_argument('--force', action='store_true', help='ignore checkpoints and run every task')
+    run_parser.add_argument('--profile-memory', metavar='REPORT', help='write a memory report of every task')
+    run_parser.add_argument('--memory-budget', type=float, metavar='MB', help='lower concurrency near this RSS')
+
+    subparsers.add_parser('status', help='show the checkpoint of every task')
+    subparsers.add_parser('check', help='exit 0 if any source has updates, using the standard library only')
+
+    export_parser = subparsers.add_parser('export', help='export the rows changed after a version')
+    export_parser.add_argument('--since', type=int, default=0, help='version already synced')
+    export_parser.add_argument('--format', choices=['ndjson', 'arrow'], default='ndjson')
+    export_parser.add_argument('--output', default='-', help="path of the export, '-' for stdout")
+
+    args = parser.parse_args(argv)
+    state = load_state(args.state)
+
+    if args.command == 'status':
+
+        for task_id, entry in sorted(state.items()):
+
+            print(task_id, entry['status'], entry['finished_at'], entry.get('error', ''))
+
+        return 0
+
+    if args.command == 'check':
+
+        import update_check
+
+        return update_check.main()
+
+    if args.command == 'export':
+
+        version = change_feed.export_changes(args.since, args.output, args.format)
+        print(version, file=sys.stderr)
+
+        return 0
+
+    tasks = build_tasks(args.countries, daily=args.daily, dbname=args.load)
+    profiler = None
+    budget = None
+
+    if args.profile_memory:
+
+        profiler = memory_profiling.MemoryProfiler(args.profile_memory)
+        profiler.start()
+
+    if args.memory_budget:
+
+        budget = memory_profiling.MemoryBudget(args.memory_budget * 1024 * 1024)
+
+    try:
+
+        failed = run_tasks(
+            tasks, state, args.state,
+            workers=args.workers,
+            max_age=datetime.timedelta(hours=args.max_age),
+            force=args.force,
+            profiler=profiler,
+            budget=budget
+        )
+
+    finally:
+
+        if profiler is not None:
+
+            profiler.stop()
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+
+	raise SystemExit(main())
@@ -0,0 +1,114 @@
+import argparse
+import subprocess
+import sys
+
+
+heavy_modules = ['pandas', 'numpy', 'bs4', 'requests', 'psycopg2', 'asyncpg']
+
+
+entry_points = {
+    'update_check': 100,
+    'pipeline': 100
+}
+
+
+def import_times(module):
+    """
+    Measure the imports of a module in a fresh interpreter with python -X importtime.
+
+    parameters:
+        module: str.
+        Name of the module.
+
+    returns:
+        times: dict.
+        Cumulative import time in microseconds, keyed by the name of every imported module.
+    """
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import '+module],
+        capture_output=True, text=True, check=True
+    )
+
+    times = {}
+
+    for line in result.stderr.splitlines():
+
+        if not line.startswith('import time:') or 'cumulative' in line:
+
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def check_entry_point(module, budget):
+    """
+    Check that an entry point imports no heavy dependency and starts within its time budget.
+
+    parameters:
+        module: str.
+        Name of the entry point module.
+
+        budget: float.
+        Maximum cumulative import time of the module, in milliseconds.
+
+    returns:
+        problems: list.
+        Descriptions of the budget violations. Empty if the entry point is within budget.
+    """
+
+    times = import_times(module)
+    elapsed = times[module] / 1000
+    problems = []
+
+    for name in times:
+
+        if name.split('.')[0] in heavy_modules:
+
+            problems.append(module+' imports '+name)
+
+    if elapsed > budget:
+
+        problems.append(module+' takes %.1fms to import, budget %.1fms' % (elapsed, budget))
+
+    print("%s: %.1fms (budget %.1fms)" % (module, elapsed, budget))
+
+    return problems
+
+
+def main(argv=None):
+    """
+    Command line entry point of the startup benchmark.
+
+    parameters:
+        argv: list.
+        Command line arguments. Read from sys.argv when not passed.
+
+    returns:
+        code: int.
+        Exit code, 1 if any entry point is over budget.
+    """
+
+    parser = argparse.ArgumentParser(description='Guard the startup time of the entry points.')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every time budget, for slow machines')
+    args = parser.parse_args(argv)
+
+    problems = []
+
+    for module, budget in entry_points.items():
+
+        problems += check_entry_point(module, budget * args.scale)
+
+    for problem in problems:
+
+        print("Over budget: ", problem)
+
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+
+	raise SystemExit(main())
@@ -0,0 +1,187 @@
+import csv
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import change_feed
+
+
+columns = ['date', 'total_cases', 'daily_cases', 'active_cases', 'total_deaths', 'daily_deaths']
+
+
+def country_frame(rows):
+
+    return pd.DataFrame(rows, columns=columns)
+
+
+history = [
+    ['2020-06-01', '22658', 'null', '100', '10', 'null'],
+    ['2020-06-02', '22700', '42', '120', '12', '2'],
+    ['2020-06-03', '22750', '50', '130', '15', '3']
+]
+
+
+@pytest.fixture
+def data(tmp_path):
+
+    directory = tmp_path / 'Data'
+    directory.mkdir()
+
+    return {'directory': str(directory), 'path': str(tmp_path / 'changes.csv')}
+
+
+def write(dataframe, country, data):
+
+    return change_feed.write_country_stats(dataframe, country, data['directory'], data['path'])
+
+
+def full_scan(path):
+
+    with open(path, newline='') as file:
+
+        rows = list(csv.DictReader(file))
+
+    changes = []
+
+    for row in rows:
+
+        row['version'] = int(row['version'])
+
+        for stat in change_feed.stat_columns:
+
+            row[stat] = change_feed.parse_value(row[stat])
+
+        changes.append(row)
+
+    return changes
+
+
+def test_diff_rows_compares_numbers():
+
+    previous = country_frame(history)
+    current = country_frame([
+        ['2020-06-01', '22658.0', '', '100.0', '10', 'nan'],
+        ['2020-06-02', '22700.0', '42.0', '120', '12.0', '2'],
+        ['2020-06-03', '22750', '50', '130', '15', '3']
+    ])
+
+    assert change_feed.diff_rows(previous, current).empty
+
+
+def test_diff_rows_records_inserts_updates_and_deletes():
+
+    previous = country_frame(history)
+    current = country_frame([
+        ['2020-06-02', '22700', '42', '125', '12', '2'],
+        ['2020-06-03', '22750', '50', '130', '15', '3'],
+        ['2020-06-04', '22800', '50', '140', '16', '1']
+    ])
+
+    changes = change_feed.diff_rows(previous, current)
+
+    assert changes[['date', 'change']].values.tolist() == [
+        ['2020-06-01', 'delete'], ['2020-06-02', 'update'], ['2020-06-04', 'insert']
+    ]
+    assert changes.total_cases.tolist() == ['22658', '22700', '22800']
+
+
+def test_first_write_bootstraps_existing_data_files(data):
+
+    country_frame(history).to_csv(data['directory']+'/covid19_peru_stats.csv', index=False)
+    country_frame(history[:2]).to_csv(data['directory']+'/covid19_chile_stats.csv', index=False)
+
+    assert write(pd.read_csv(data['directory']+'/covid19_peru_stats.csv'), 'peru', data) == 5
+
+    changes = change_feed.changes_since(0, data['path'])
+
+    assert [(change['country'], change['change']) for change in changes] == [('chile', 'insert')] * 2 + [
+        ('peru', 'insert')
+    ] * 3
+
+
+def test_unchanged_rewrite_records_nothing(data):
+
+    write(country_frame(history), 'peru', data)
+    version = change_feed.last_version(data['path'])
+
+    # Read back with the defaults of pandas, whole numbers with missing values come back as floats.
+    assert write(pd.read_csv(data['directory']+'/covid19_peru_stats.csv'), 'peru', data) == version
+
+
+def test_removed_rows_are_recorded(data):
+
+    write(country_frame(history), 'peru', data)
+    version = change_feed.last_version(data['path'])
+
+    write(country_frame(history[2:] + [['2020-06-04', '22800', '50', '140', '16', '1']]), 'peru', data)
+
+    changes = change_feed.changes_since(version, data['path'])
+
+    assert [(change['date'], change['change']) for change in changes] == [
+        ('2020-06-01', 'delete'), ('2020-06-02', 'delete'), ('2020-06-04', 'insert')
+    ]
+    assert changes[0]['total_cases'] == 22658
+
+
+def test_changes_since_matches_full_scan(data):
+
+    for day in range(1, 30):
+
+        rows = [
+            ['2020-06-%02d' % date, str(date * 10 ** (date % 7)), str(date), '1', '0', 'null']
+            for date in range(1, day + 1)
+        ]
+        write(country_frame(rows), 'peru' if day % 2 else 'saudi-arabia', data)
+
+    scan = full_scan(data['path'])
+    last = change_feed.last_version(data['path'])
+
+    assert [change['version'] for change in scan] == list(range(1, last + 1))
+
+    for version in range(0, last + 2):
+
+        assert change_feed.changes_since(version, data['path']) == [
+            change for change in scan if change['version'] > version
+        ]
+
+
+def test_changes_since_without_log(data):
+
+    assert change_feed.changes_since(0, data['path']) == []
+    assert change_feed.last_version(data['path']) == 0
+
+
+def test_export_ndjson(data, tmp_path):
+
+    write(country_frame(history), 'peru', data)
+    output = str(tmp_path / 'changes.ndjson')
+
+    assert change_feed.export_changes(1, output, path=data['path']) == 3
+
+    with open(output) as file:
+
+        exported = [json.loads(line) for line in file]
+
+    assert exported == change_feed.changes_since(1, data['path'])
+
+
+def test_export_arrow(data, tmp_path, capsysbinary):
+
+    pa = pytest.importorskip('pyarrow')
+
+    write(country_frame(history), 'peru', data)
+    output = str(tmp_path / 'changes.arrow')
+
+    assert change_feed.export_changes(0, output, format='arrow', batch_size=2, path=data['path']) == 3
+
+    with pa.OSFile(output, 'rb') as source:
+
+        table = pa.ipc.open_stream(source).read_all()
+
+    assert table.to_pylist() == change_feed.changes_since(0, data['path'])
+
+    assert change_feed.export_changes(0, '-', format='arrow', path=data['path']) == 3
+    assert not os.path.exists('-')
+    assert pa.ipc.open_stream(capsysbinary.readouterr().out).read_all().num_rows == 3
@@ -0,0 +1,221 @@
+import os
+
+import pandas as pd
+import pytest
+
+import data_validation
+
+
+columns = ['date', 'total_cases', 'daily_cases', 'active_cases', 'total_deaths', 'daily_deaths']
+
+
+def country_frame(rows):
+
+    return pd.DataFrame(rows, columns=columns)
+
+
+history = [
+    ['2020-06-01', '100', '10', '50', '10', '1'],
+    ['2020-06-02', '120', '20', '60', '12', '2'],
+    ['2020-06-03', '150', '30', '70', '15', '3']
+]
+
+
+@pytest.fixture
+def paths(tmp_path):
+
+    (tmp_path / 'Data').mkdir()
+
+    return {
+        'directory': str(tmp_path / 'Data'),
+        'quarantine_to': str(tmp_path / 'quarantine'),
+        'accepted_from': str(tmp_path / 'accepted_revisions.csv')
+    }
+
+
+def check(dataframe, paths):
+
+    return data_validation.check_country(dataframe, 'peru', **paths)
+
+
+def write_data_file(rows, paths):
+
+    country_frame(rows).to_csv(paths['directory']+'/covid19_peru_stats.csv', index=False)
+
+
+def quarantined(paths):
+
+    return pd.read_csv(paths['quarantine_to']+'/covid19_peru_stats.csv', dtype=str, keep_default_na=False)
+
+
+def test_clean_history_passes(paths):
+
+    assert check(country_frame(history), paths).empty
+    assert not os.path.exists(paths['quarantine_to']+'/covid19_peru_stats.csv')
+
+
+def test_null_daily_values_are_missing(paths):
+
+    rows = [row[:] for row in history]
+    rows[1][2] = 'null'
+    rows[1][5] = 'null'
+
+    assert check(country_frame(rows), paths).empty
+
+
+def test_decreasing_total_blocks(paths):
+
+    rows = history + [['2020-06-04', '140', '0', '70', '15', '0']]
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(rows), paths)
+
+    assert quarantined(paths).reasons.tolist() == ['decreasing_total_cases;daily_cases_mismatch']
+
+
+def test_decrease_already_in_data_file_passes(paths):
+
+    rows = history + [['2020-06-04', '140', '0', '70', '15', '0']]
+    write_data_file(rows, paths)
+
+    assert check(country_frame(rows + [['2020-06-05', '160', '20', '75', '16', '1']]), paths).empty
+
+    rows[-1][1] = '130'
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(rows), paths)
+
+
+def test_decrease_reported_as_negative_daily_does_not_block(paths):
+
+    rows = history + [['2020-06-04', '140', '-10', '70', '15', '0']]
+
+    failed = check(country_frame(rows), paths)
+
+    assert failed.reasons.tolist() == ['negative_daily']
+    assert not failed.blocking.any()
+
+
+def test_daily_mismatch_blocks(paths):
+
+    rows = [row[:] for row in history]
+    rows[2][2] = '25'
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(rows), paths)
+
+    assert quarantined(paths).reasons.tolist() == ['daily_cases_mismatch']
+
+
+@pytest.mark.parametrize('column', [1, 3])
+def test_negative_total_or_active_blocks(paths, column):
+
+    rows = [row[:] for row in history]
+    rows[0][column] = '-1'
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(rows), paths)
+
+    assert 'negative_total' in quarantined(paths).reasons[0]
+
+
+def test_blocked_file_keeps_previous_contents(paths):
+
+    write_data_file(history, paths)
+    path = paths['directory']+'/covid19_peru_stats.csv'
+
+    with open(path) as file:
+
+        before = file.read()
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(history + [['2020-06-04', '140', '0', '70', '15', '0']]), paths)
+
+    with open(path) as file:
+
+        assert file.read() == before
+
+
+def test_accepted_revision_passes(paths):
+
+    rows = history + [['2020-06-04', '140', '0', '70', '15', '0']]
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(rows), paths)
+
+    assert data_validation.accept_revisions('peru', paths['quarantine_to'], paths['accepted_from']) == 1
+    assert check(country_frame(rows), paths).empty
+
+    rows[-1][1] = '130'
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(rows), paths)
+
+
+def test_malformed_rows_cannot_be_accepted(paths):
+
+    rows = [row[:] for row in history]
+    rows[2][1] = '1,50'
+
+    with pytest.raises(ValueError):
+
+        check(country_frame(rows), paths)
+
+    assert data_validation.accept_revisions('peru', paths['quarantine_to'], paths['accepted_from']) == 0
+
+
+def test_country_checks_every_country_at_once():
+
+    data = pd.concat([
+        country_frame(history).assign(country='peru'),
+        country_frame([['2020-06-01', '10', '1', '5', '1', '0'], ['2020-06-02', '8', '-2', '5', '1', '0']]).assign(
+            country='chile'
+        )
+    ], ignore_index=True)
+
+    checks = data_validation.country_checks(data)
+
+    assert not checks[data.country == 'peru'].any().any()
+    assert checks.negative_daily.tolist() == [False] * 4 + [True]
+    assert not checks.decreasing_total_cases.any()
+
+
+def overall_frame(rows):
+
+    return pd.DataFrame(rows, columns=['country', 'total_cases', 'total_deaths', 'total_recoveries'])
+
+
+def test_overall_passes(tmp_path):
+
+    overall = overall_frame([['Peru', '150', '15', 'null'], ['Chile', '10', '1', '5']])
+
+    assert data_validation.check_overall(overall, str(tmp_path)).empty
+
+
+def test_overall_misaligned_chunk_blocks(tmp_path):
+
+    # A cell missing from the table shifts the statistics of the row by one column.
+    overall = overall_frame([['Peru', '150', '15', 'null'], ['Chile', '1', '10', '5']])
+
+    with pytest.raises(ValueError):
+
+        data_validation.check_overall(overall, str(tmp_path))
+
+    failed = pd.read_csv(tmp_path / 'covid19_overall_stat.csv')
+
+    assert failed.country.tolist() == ['Chile']
+    assert failed.reasons.tolist() == ['deaths_exceed_cases']
+
+
+def test_overall_negative_value_blocks(tmp_path):
+
+    with pytest.raises(ValueError):
+
+        data_validation.check_overall(overall_frame([['Peru', '150', '-15', 'null']]), str(tmp_path))
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import overall_stats
+import update_check
+
+
+responses_directory = os.path.join(os.path.dirname(__file__), 'responses')
+
+
+def saved_response(name):
+
+    with open(os.path.join(responses_directory, name), 'rb') as file:
+
+        return file.read()
+
+
+@pytest.fixture
+def mediawiki(monkeypatch, tmp_path):
+    """
+    Local stand-in for the MediaWiki API serving saved responses, the page metadata for
+    action=query and the rendered HTML for action=parse. The section response can be switched to
+    one without the table to exercise the fallback.
+    """
+
+    requests_seen = []
+    sections = {'0': 'section_with_table.json'}
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            requests_seen.append(params)
+
+            if params.get('action') == 'query':
+
+                body = saved_response('revid.json')
+
+            elif 'section' in params:
+
+                body = saved_response(sections[params['section']])
+
+            else:
+
+                body = saved_response('page.json')
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    (tmp_path / 'Data').mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    yield {
+        'url': 'http://127.0.0.1:%d/w/api.php' % server.server_port,
+        'requests': requests_seen,
+        'sections': sections
+    }
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_scrapes_table_section_and_records_revision(mediawiki):
+
+    assert overall_stats.scrape_overall_data_api(mediawiki['url'])
+
+    revid_request, section_request = mediawiki['requests']
+    assert revid_request['action'] == 'query'
+    assert revid_request['prop'] == 'info'
+    assert revid_request['titles'] == overall_stats.page_title
+    assert section_request['action'] == 'parse'
+    assert section_request['oldid'] == '960172348'
+    assert section_request['section'] == '0'
+
+    with open('Data/covid19_overall_stat.csv') as file:
+
+        assert file.read().splitlines() == [
+            'country,total_cases,total_deaths,total_recoveries',
+            'United States,1786171,104235,385125',
+            'United Kingdom,272826,38376,null'
+        ]
+
+    assert overall_stats.cached_revision() == 960172348
+
+
+def test_skips_scrape_when_revision_is_unchanged(mediawiki):
+
+    overall_stats.save_revision(960172348)
+
+    assert not overall_stats.scrape_overall_data_api(mediawiki['url'])
+    assert [request['action'] for request in mediawiki['requests']] == ['query']
+    assert not os.path.exists('Data/covid19_overall_stat.csv')
+
+
+def test_force_scrapes_unchanged_revision(mediawiki):
+
+    overall_stats.save_revision(960172348)
+
+    assert overall_stats.scrape_overall_data_api(mediawiki['url'], force=True)
+    assert os.path.exists('Data/covid19_overall_stat.csv')
+
+
+def test_falls_back_to_whole_page_when_table_is_not_in_section(mediawiki):
+
+    mediawiki['sections']['0'] = 'section_without_table.json'
+
+    revid, html = overall_stats.fetch_table_html(mediawiki['url'])
+
+    assert revid == 960172348
+    assert 'id="thetable"' in html
+    assert 'section' in mediawiki['requests'][1]
+    assert 'section' not in mediawiki['requests'][2]
+    assert mediawiki['requests'][2]['oldid'] == '960172348'
+
+
+def test_update_check_compares_latest_revision(mediawiki):
+
+    assert update_check.wikipedia_has_update(mediawiki['url'])
+
+    overall_stats.save_revision(960172348)
+
+    assert not update_check.wikipedia_has_update(mediawiki['url'])
+    assert all(request['action'] == 'query' for request in mediawiki['requests'])
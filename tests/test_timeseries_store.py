@@ -0,0 +1,100 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from timeseries_store import TimeSeriesStore, DailyUpdate, stat_dtypes
+
+
+def country_frame(dates, total_cases, daily_cases=None):
+
+    return pd.DataFrame({
+        'date': dates,
+        'total_cases': total_cases,
+        'daily_cases': daily_cases if daily_cases is not None else [1] * len(dates),
+        'active_cases': total_cases,
+        'total_deaths': [0] * len(dates),
+        'daily_deaths': [0] * len(dates)
+    })
+
+
+@pytest.fixture
+def store():
+
+    return TimeSeriesStore.from_frames({
+        'us': country_frame(['2020-06-01', '2020-06-02', '2020-06-03', '2020-06-04'], [10, 20, 30, 40]),
+        'peru': country_frame(['2020-06-02', '2020-06-03'], [5, 6], [np.nan, 1])
+    })
+
+
+def test_country_slices_are_views(store):
+
+    series = store.country('us')
+
+    assert np.shares_memory(series.dates, store.dates)
+
+    for stat in stat_dtypes:
+
+        assert np.shares_memory(series.stats[stat], store.stats[stat])
+
+
+def test_between_slices_are_views(store):
+
+    for series in store.between('2020-06-02', '2020-06-03').values():
+
+        assert np.shares_memory(series.dates, store.dates)
+        assert np.shares_memory(series.stats['total_cases'], store.stats['total_cases'])
+
+
+def test_date_bounds_are_inclusive(store):
+
+    series = store.country('us', '2020-06-02', '2020-06-03')
+
+    assert list(series.stats['total_cases']) == [20, 30]
+    assert len(store.country('us', end='2020-06-01')) == 1
+    assert len(store.country('us', start='2020-06-04')) == 1
+    assert {country: len(series) for country, series in store.between('2020-06-03', '2020-06-03').items()} == {
+        'us': 1, 'peru': 1
+    }
+
+
+def test_nan_survives_the_sentinel(store):
+
+    frame = store.country('peru').to_frame()
+
+    assert np.isnan(frame.daily_cases[0])
+    assert frame.daily_cases[1] == 1
+
+    update = DailyUpdate(datetime.date(2020, 6, 4), 7, 1, 7, np.nan, np.nan)
+    updated = store.append({'peru': update})
+    last = updated.last('peru')
+
+    assert last.date == datetime.date(2020, 6, 4)
+    assert last.total_cases == 7
+    assert np.isnan(last.total_deaths) and np.isnan(last.daily_deaths)
+    assert np.isnan(updated.country('peru').to_frame().daily_deaths.iloc[-1])
+
+
+def test_append_keeps_other_countries(store):
+
+    updated = store.append({'peru': DailyUpdate('2020-06-04', 7, 1, 7, 0, 0)})
+
+    assert len(updated) == len(store) + 1
+    assert list(updated.country('us').stats['total_cases']) == [10, 20, 30, 40]
+    assert list(updated.country('peru').stats['total_cases']) == [5, 6, 7]
+
+
+@pytest.mark.parametrize('date', ['2020-06-03', '2020-06-01'])
+def test_append_refuses_update_not_later_than_last_date(store, date):
+
+    with pytest.raises(ValueError):
+
+        store.append({'peru': DailyUpdate(date, 7, 1, 7, 0, 0)})
+
+
+def test_append_refuses_unknown_country(store):
+
+    with pytest.raises(ValueError):
+
+        store.append({'chile': DailyUpdate('2020-06-04', 7, 1, 7, 0, 0)})
@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+
+import update_check
+
+
+page = '<html><div class="news_date"><h4>Jun 15 (GMT)</h4></div><div class="news_date"><h4>Jun 14 (GMT)</h4></div></html>'
+
+
+@pytest.mark.parametrize('split', range(1, len(page)))
+def test_news_date_split_across_chunks(split):
+
+    parser = update_check.NewsDateParser()
+    parser.feed(page[:split])
+    parser.feed(page[split:])
+
+    assert parser.news_date == 'Jun 15 (GMT)'
+
+
+def test_news_date_is_none_until_heading_ends():
+
+    parser = update_check.NewsDateParser()
+    parser.feed('<div class="news_date"><h4>Jun 1')
+
+    assert parser.news_date is None
+
+
+def write_data_file(directory, rows):
+
+    with open(directory / 'covid19_peru_stats.csv', 'w') as file:
+
+        file.write('date,total_cases,daily_cases,active_cases,total_deaths,daily_deaths\n')
+
+        for row in rows:
+
+            file.write(row+'\n')
+
+
+def test_last_stored_date_reads_last_row(tmp_path):
+
+    write_data_file(tmp_path, ['2020-06-01,1,1,1,0,null', '2020-06-02,3,2,3,0,null'])
+
+    assert update_check.last_stored_date('peru', str(tmp_path)) == datetime.date(2020, 6, 2)
+
+
+def test_last_stored_date_without_rows(tmp_path):
+
+    assert update_check.last_stored_date('peru', str(tmp_path)) is None
+
+    write_data_file(tmp_path, [])
+
+    assert update_check.last_stored_date('peru', str(tmp_path)) is None
+
+
+@pytest.mark.parametrize('page_date, expected', [
+    (datetime.date(2020, 6, 3), True),
+    (datetime.date(2020, 6, 2), False),
+    (None, False)
+])
+def test_country_has_update_only_when_page_is_newer(tmp_path, monkeypatch, page_date, expected):
+
+    write_data_file(tmp_path, ['2020-06-01,1,1,1,0,null', '2020-06-02,3,2,3,0,null'])
+    monkeypatch.setattr(update_check, 'news_date', lambda url: page_date)
+
+    assert update_check.country_has_update('peru', str(tmp_path)) is expected
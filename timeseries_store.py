@@ -0,0 +1,358 @@
+import numpy as np
+import pandas as pd
+
+
+stat_dtypes = {
+    'total_cases':np.int64,
+    'daily_cases':np.int32,
+    'active_cases':np.int64,
+    'total_deaths':np.int64,
+    'daily_deaths':np.int32
+}
+
+
+def missing_value(stat):
+    """
+    Sentinel used in place of NaN for a statistic, the smallest value of its integer type.
+
+    parameters:
+        stat: str.
+        Name of the statistic.
+
+    returns:
+        value: int.
+        The sentinel of the statistic.
+    """
+
+    value = np.iinfo(stat_dtypes[stat]).min
+
+    return value
+
+
+class DailyUpdate:
+    """
+    Statistics of a country for a single day. Used instead of a pandas Series for single-day updates,
+    which keeps the record small and never writes through to the row it was built from.
+    """
+
+    __slots__ = ('date',) + tuple(stat_dtypes)
+
+    def __init__(self, date, total_cases, daily_cases, active_cases, total_deaths, daily_deaths):
+
+        self.date = date
+        self.total_cases = total_cases
+        self.daily_cases = daily_cases
+        self.active_cases = active_cases
+        self.total_deaths = total_deaths
+        self.daily_deaths = daily_deaths
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build the record from a row of a country DataFrame.
+
+        parameters:
+            row: Series.
+            A row with the date and statistics columns.
+
+        returns:
+            update: DailyUpdate.
+            A copy of the row.
+        """
+
+        update = cls(row['date'], *(row[stat] for stat in stat_dtypes))
+
+        return update
+
+    def as_dict(self):
+        """
+        Convert the record to a dict keyed by the columns of the data files.
+
+        returns:
+            row: dict.
+            The date and statistics of the record.
+        """
+
+        row = {name:getattr(self, name) for name in self.__slots__}
+
+        return row
+
+    def __repr__(self):
+
+        return 'DailyUpdate(' + ', '.join(name+'='+repr(getattr(self, name)) for name in self.__slots__) + ')'
+
+
+class CountrySeries:
+    """
+    Statistics of a country over a range of dates. The arrays are views into the store they were
+    sliced from and are not copied.
+    """
+
+    __slots__ = ('country', 'dates', 'stats')
+
+    def __init__(self, country, dates, stats):
+
+        self.country = country
+        self.dates = dates
+        self.stats = stats
+
+    def __len__(self):
+
+        return len(self.dates)
+
+    def to_frame(self):
+        """
+        Convert the series to a DataFrame shaped like the data files. Sentinels are turned back into NaN.
+
+        returns:
+            dataframe: DataFrame.
+            DataFrame containing dates and statistics of the country.
+        """
+
+        dataframe = pd.DataFrame({'date':self.dates.astype('datetime64[D]').astype(object)})
+
+        for stat, values in self.stats.items():
+
+            is_missing = values == missing_value(stat)
+
+            if is_missing.any():
+
+                values = values.astype('float64')
+                values[is_missing] = np.nan
+
+            dataframe[stat] = values
+
+        return dataframe
+
+
+class TimeSeriesStore:
+    """
+    Columnar in-memory store of the statistics of every country. All countries share one contiguous
+    date array and one integer array per statistic. Each country occupies a contiguous range of rows,
+    sorted by date, found through the offsets index.
+    """
+
+    __slots__ = ('dates', 'stats', 'offsets')
+
+    def __init__(self, dates, stats, offsets):
+
+        self.dates = dates
+        self.stats = stats
+        self.offsets = offsets
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Build the store from a DataFrame per country.
+
+        parameters:
+            frames: dict.
+            DataFrames shaped like the data files, keyed by country.
+
+        returns:
+            store: TimeSeriesStore.
+            The store holding every country.
+        """
+
+        offsets = {}
+        start = 0
+
+        for country, dataframe in frames.items():
+
+            offsets[country] = (start, start + len(dataframe))
+            start += len(dataframe)
+
+        frames = [dataframe.sort_values('date') for dataframe in frames.values()]
+
+        dates = np.empty(start, dtype='datetime64[D]')
+        stats = {stat:np.empty(start, dtype=dtype) for stat, dtype in stat_dtypes.items()}
+
+        for dataframe, (begin, end) in zip(frames, offsets.values()):
+
+            dates[begin:end] = pd.to_datetime(dataframe['date']).values.astype('datetime64[D]')
+
+            for stat in stat_dtypes:
+
+                stats[stat][begin:end] = dataframe[stat].fillna(missing_value(stat)).values
+
+        store = cls(dates, stats, offsets)
+
+        return store
+
+    @classmethod
+    def read_csv(cls, countries, directory='./Data'):
+        """
+        Build the store from the data files of the countries.
+
+        parameters:
+            countries: list.
+            Names of the countries as used in the data file names.
+
+            directory: str.
+            Directory of the data files. Default ./Data
+
+        returns:
+            store: TimeSeriesStore.
+            The store holding every country.
+        """
+
+        frames = {
+            country:pd.read_csv(directory+'/covid19_'+country+'_stats.csv') for country in countries
+        }
+
+        store = cls.from_frames(frames)
+
+        return store
+
+    @property
+    def countries(self):
+
+        return list(self.offsets)
+
+    def __len__(self):
+
+        return len(self.dates)
+
+    def country(self, country, start=None, end=None):
+        """
+        Slice the statistics of a country, optionally between two dates. No data is copied.
+
+        parameters:
+            country: str.
+            Name of the country.
+
+            start: str or date.
+            First date of the slice, included. From the first date when not passed.
+
+            end: str or date.
+            Last date of the slice, included. Up to the last date when not passed.
+
+        returns:
+            series: CountrySeries.
+            Views of the dates and statistics of the country.
+        """
+
+        begin, stop = self.offsets[country]
+        dates = self.dates[begin:stop]
+
+        if start is not None:
+
+            begin += int(np.searchsorted(dates, np.datetime64(start, 'D'), side='left'))
+
+        if end is not None:
+
+            stop = self.offsets[country][0] + int(np.searchsorted(dates, np.datetime64(end, 'D'), side='right'))
+
+        series = CountrySeries(
+            country, self.dates[begin:stop], {stat:values[begin:stop] for stat, values in self.stats.items()}
+        )
+
+        return series
+
+    def between(self, start=None, end=None):
+        """
+        Slice the statistics of every country between two dates. No data is copied.
+
+        parameters:
+            start: str or date.
+            First date of the slice, included.
+
+            end: str or date.
+            Last date of the slice, included.
+
+        returns:
+            series: dict.
+            CountrySeries keyed by country.
+        """
+
+        series = {country:self.country(country, start, end) for country in self.offsets}
+
+        return series
+
+    def last(self, country):
+        """
+        The most recent statistics of a country.
+
+        parameters:
+            country: str.
+            Name of the country.
+
+        returns:
+            update: DailyUpdate.
+            A copy of the last row of the country, with sentinels turned into NaN.
+        """
+
+        index = self.offsets[country][1] - 1
+        values = []
+
+        for stat, array in self.stats.items():
+
+            value = array[index].item()
+            values.append(np.nan if value == missing_value(stat) else value)
+
+        update = DailyUpdate(self.dates[index].item(), *values)
+
+        return update
+
+    def append(self, updates):
+        """
+        Add single-day updates to the store. The arrays are contiguous, so a new store is built with
+        one copy of every array whatever the number of updates.
+
+        parameters:
+            updates: dict.
+            DailyUpdate keyed by country. Each country must already be in the store and each update
+            must be later than its last date.
+
+        returns:
+            store: TimeSeriesStore.
+            A new store including the updates.
+
+        raises:
+            ValueError: if a country is not in the store or an update is not later than its last date.
+        """
+
+        for country, update in updates.items():
+
+            if country not in self.offsets:
+
+                raise ValueError(country+' is not in the store')
+
+            begin, stop = self.offsets[country]
+
+            if stop > begin and np.datetime64(update.date, 'D') <= self.dates[stop - 1]:
+
+                raise ValueError(
+                    country+' update of '+str(update.date)+' is not later than '+str(self.dates[stop - 1])
+                )
+
+        offsets = {}
+        insert_at = []
+        shift = 0
+
+        for country, (begin, stop) in self.offsets.items():
+
+            if country in updates:
+
+                insert_at.append(stop)
+                offsets[country] = (begin + shift, stop + shift + 1)
+                shift += 1
+
+            else:
+
+                offsets[country] = (begin + shift, stop + shift)
+
+        ordered = [updates[country] for country in self.offsets if country in updates]
+
+        dates = np.insert(self.dates, insert_at, [np.datetime64(update.date, 'D') for update in ordered])
+        stats = {}
+
+        for stat, values in self.stats.items():
+
+            new_values = [getattr(update, stat) for update in ordered]
+            new_values = [missing_value(stat) if pd.isna(value) else value for value in new_values]
+            stats[stat] = np.insert(values, insert_at, np.array(new_values, dtype=values.dtype))
+
+        store = TimeSeriesStore(dates, stats, offsets)
+
+        return store
@@ -0,0 +1,238 @@
+import csv
+import json
+import os
+import re
+import datetime
+from html.parser import HTMLParser
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import overall_stats
+from country_stats import countries, country_url, request_timeout
+
+
+user_agent = 'COVID-19-Web-Scraper'
+
+
+class NewsDateParser(HTMLParser):
+    """
+    Minimal parser finding the date of the latest update on a worldometers country page, the
+    contents of the first h4 tag inside the div tag class - news_date
+    """
+
+    def __init__(self):
+
+        super().__init__()
+        self.in_news_date = False
+        self.in_heading = False
+        self.fragments = []
+        self.news_date = None
+
+    def handle_starttag(self, tag, attrs):
+
+        if self.news_date is not None:
+
+            return
+
+        if tag == 'div' and 'news_date' in (dict(attrs).get('class') or '').split():
+
+            self.in_news_date = True
+
+        elif tag == 'h4' and self.in_news_date:
+
+            self.in_heading = True
+
+    def handle_data(self, data):
+
+        # Text is handed over in fragments when it spans two fed chunks.
+        if self.in_heading:
+
+            self.fragments.append(data)
+
+    def handle_endtag(self, tag):
+
+        if tag == 'h4' and self.in_heading:
+
+            self.news_date = ''.join(self.fragments)
+            self.in_heading = False
+            self.in_news_date = False
+
+
+def news_date(url, chunk_size=16384):
+    """
+    Retrieve the date of the latest update on a worldometers country page. The page is parsed while
+    it downloads, and the download stops as soon as the end tag of the date is parsed.
+
+    parameters:
+        url: str.
+        URL of the country page.
+
+        chunk_size: int.
+        Number of bytes read at a time. Default 16384.
+
+    returns:
+        date: date.
+        Date of the latest update, None if the page has no update.
+    """
+
+    parser = NewsDateParser()
+
+    with urlopen(Request(url, headers={'User-Agent':user_agent}), timeout=request_timeout) as response:
+
+        while parser.news_date is None:
+
+            chunk = response.read(chunk_size)
+
+            if not chunk:
+
+                break
+
+            parser.feed(chunk.decode('utf-8', errors='replace'))
+
+    if parser.news_date is None:
+
+        return None
+
+    page_date = re.sub(r'\(.*\)','',parser.news_date).strip()
+    date = datetime.datetime.strptime(page_date+' '+str(datetime.date.today().year), '%b %d %Y').date()
+
+    return date
+
+
+def last_stored_date(country, directory='./Data'):
+    """
+    Retrieve the date of the last row in the data file of a country, reading only the end of the file.
+
+    parameters:
+        country: str.
+        Name of the country as used in the data file names.
+
+        directory: str.
+        Directory of the data files.
+
+    returns:
+        date: date.
+        Date of the last row, None if the data file does not exist or has no rows.
+    """
+
+    path = directory+'/covid19_'+country+'_stats.csv'
+
+    if not os.path.exists(path):
+
+        return None
+
+    with open(path, 'rb') as file:
+
+        header = file.readline()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(max(len(header), size - 4096))
+        lines = [line for line in file.read().splitlines() if line.strip()]
+
+    if not lines:
+
+        return None
+
+    columns, row = csv.reader([header.decode('utf-8'), lines[-1].decode('utf-8')])
+    date = datetime.datetime.strptime(row[columns.index('date')], '%Y-%m-%d').date()
+
+    return date
+
+
+def country_has_update(country, directory='./Data'):
+    """
+    Checks whether a country has statistics on worldometers newer than the last row of its data file.
+
+    parameters:
+        country: str.
+        Name of the country as used in the url.
+
+        directory: str.
+        Directory of the data files.
+
+    returns: bool.
+    True if newer statistics are available.
+    """
+
+    page_date = news_date(country_url(country))
+
+    if page_date is None:
+
+        return False
+
+    stored_date = last_stored_date(country, directory)
+
+    return stored_date is None or page_date > stored_date
+
+
+def wikipedia_has_update(api_url=overall_stats.api_url):
+    """
+    Checks whether the Wikipedia page changed since the revision the overall statistics were scraped from.
+
+    parameters:
+        api_url: str.
+        URL of the MediaWiki API.
+
+    returns: bool.
+    True if the page has a new revision.
+    """
+
+    params = urlencode(dict(overall_stats.revision_params(), format='json', formatversion=2))
+
+    request = Request(api_url+'?'+params, headers={'User-Agent':user_agent})
+
+    with urlopen(request, timeout=request_timeout) as response:
+
+        revid = overall_stats.query_revision(json.load(response)['query'])
+
+    return revid != overall_stats.cached_revision()
+
+
+def check_for_updates(countries=countries):
+    """
+    Check every source for updates using the standard library only.
+
+    parameters:
+        countries: list.
+        Names of the countries to check.
+
+    returns:
+        updates: list.
+        Names of the sources with updates, 'overall' standing for the Wikipedia page.
+    """
+
+    updates = []
+
+    if wikipedia_has_update():
+
+        updates.append('overall')
+
+    for country in countries:
+
+        if country_has_update(country):
+
+            updates.append(country)
+
+    return updates
+
+
+def main():
+    """
+    Print the sources with updates.
+
+    returns:
+        code: int.
+        Exit code, 0 if there are updates and 1 otherwise, so that the refresh can be chained to it.
+    """
+
+    updates = check_for_updates()
+
+    for source in updates:
+
+        print("Update available: ", source)
+
+    return 0 if updates else 1
+
+
+if __name__ == '__main__':
+
+	raise SystemExit(main())